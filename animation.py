@@ -0,0 +1,365 @@
+"""
+Non-blocking animations for the uStatusBoard.
+
+Effects are attached to one or more pixels of a `StatusBoard` and an
+`Animator` renders all of them at a fixed frame rate as a uasyncio task,
+sending a single write to the strip per frame. The web server or any
+poller keeps running between frames.
+
+    >>> import uasyncio
+    >>> from animation import Animator, Blink, FadeTo
+    >>> async def main():
+    ...     animator = Animator(board, fps=30)
+    ...     animator.add(FadeTo([0, 1], "green", duration=500))
+    ...     animator.add(Blink([3], "red", period=1000))
+    ...     animator.start()
+    ...     await uasyncio.sleep(10)
+    >>> uasyncio.run(main())
+
+On the host the same code runs with CPython's asyncio.
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from time import ticks_diff
+from time import ticks_ms
+
+
+def scale_color(color, level):
+    """
+    Scale a color by a level.
+
+    Args:
+        color (tuple): Color in (R, G, B) format.
+        level (int): Level from 0 (off) to 255 (color as it is).
+
+    Returns:
+        Tuple with the scaled color.
+    """
+    return (
+        color[0] * level // 255,
+        color[1] * level // 255,
+        color[2] * level // 255,
+    )
+
+
+class Effect:
+    """
+    Base class for all the effects.
+
+    Subclasses implement `update` which sets the color of the pixels
+    for a given moment of the animation.
+
+    Attributes:
+        pixels (list): Pixels the effect is applied to.
+        color: Name of the color or color in (R, G, B) format.
+        duration (int): Milliseconds the effect lasts, forever if None.
+        started (int): `ticks_ms` value when the effect started.
+    """
+
+    def __init__(self, pixels, color, duration=None):
+        self.pixels = pixels
+        self.color = color
+        self.duration = duration
+        self.started = 0
+        self.rgb = (0, 0, 0)
+
+    def start(self, board, now):
+        """
+        Prepare the effect to be rendered on the board.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            now (int): Current `ticks_ms` value.
+
+        Returns:
+            None.
+        """
+        self.started = now
+        if isinstance(self.color, str):
+            self.rgb = board.get_color(self.color)
+        else:
+            self.rgb = tuple(self.color)
+
+    def render(self, board, now):
+        """
+        Set the pixels for the current moment of the effect.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            now (int): Current `ticks_ms` value.
+
+        Returns:
+            False once the effect has finished, True otherwise.
+        """
+        elapsed = ticks_diff(now, self.started)
+        if self.duration is not None and elapsed >= self.duration:
+            self.update(board, self.duration)
+            return False
+        self.update(board, elapsed)
+        return True
+
+    def update(self, board, elapsed):
+        """
+        Set the pixels for the given moment of the effect.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            elapsed (int): Milliseconds since the effect started.
+
+        Returns:
+            None.
+        """
+        raise NotImplementedError
+
+
+class FadeTo(Effect):
+    """
+    Fade the pixels from their current color to a new one.
+    """
+
+    def __init__(self, pixels, color, duration=1000):
+        super().__init__(pixels, color, duration)
+        self.origins = []
+
+    def start(self, board, now):
+        """
+        Keep the color of each pixel to fade from it.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            now (int): Current `ticks_ms` value.
+
+        Returns:
+            None.
+        """
+        super().start(board, now)
+        self.origins = [
+            tuple(board.get_pixel_raw_color(pixel)) for pixel in self.pixels
+        ]
+
+    def update(self, board, elapsed):
+        """
+        Interpolate each pixel between its original and target color.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            elapsed (int): Milliseconds since the effect started.
+
+        Returns:
+            None.
+        """
+        duration = self.duration or 1
+        target = self.rgb
+        for pixel, origin in zip(self.pixels, self.origins):
+            board.set_pixel_raw_color(
+                pixel,
+                (
+                    origin[0] + (target[0] - origin[0]) * elapsed // duration,
+                    origin[1] + (target[1] - origin[1]) * elapsed // duration,
+                    origin[2] + (target[2] - origin[2]) * elapsed // duration,
+                ),
+            )
+
+
+class Blink(Effect):
+    """
+    Turn the pixels on and off.
+
+    Attributes:
+        period (int): Milliseconds of a whole on/off cycle.
+    """
+
+    def __init__(self, pixels, color, period=1000, count=None):
+        super().__init__(pixels, color, None if count is None else period * count)
+        self.period = period
+
+    def update(self, board, elapsed):
+        """
+        Set the pixels on during the first half of each period, they are
+        left off once the effect finishes.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            elapsed (int): Milliseconds since the effect started.
+
+        Returns:
+            None.
+        """
+        if elapsed % self.period < self.period // 2 and elapsed != self.duration:
+            color = self.rgb
+        else:
+            color = (0, 0, 0)
+        for pixel in self.pixels:
+            board.set_pixel_raw_color(pixel, color)
+
+
+class Breathe(Effect):
+    """
+    Raise and lower the level of the color smoothly.
+
+    Attributes:
+        period (int): Milliseconds of a whole breath.
+    """
+
+    def __init__(self, pixels, color, period=2000, duration=None):
+        super().__init__(pixels, color, duration)
+        self.period = period
+
+    def update(self, board, elapsed):
+        """
+        Set the pixels following a triangle wave over the period.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            elapsed (int): Milliseconds since the effect started.
+
+        Returns:
+            None.
+        """
+        level = elapsed % self.period * 510 // self.period
+        if level > 255:
+            level = 510 - level
+        color = scale_color(self.rgb, level)
+        for pixel in self.pixels:
+            board.set_pixel_raw_color(pixel, color)
+
+
+class Chase(Effect):
+    """
+    Move a lit pixel along the given pixels.
+
+    Attributes:
+        step (int): Milliseconds the light stays on each pixel.
+        background (tuple): Color for the rest of the pixels.
+    """
+
+    def __init__(self, pixels, color, step=100, background=(0, 0, 0), duration=None):
+        super().__init__(pixels, color, duration)
+        self.step = step
+        self.background = background
+
+    def update(self, board, elapsed):
+        """
+        Light up the pixel the chase is on and set the others to background.
+
+        Args:
+            board (StatusBoard): Board the effect is rendered on.
+            elapsed (int): Milliseconds since the effect started.
+
+        Returns:
+            None.
+        """
+        position = elapsed // self.step % len(self.pixels)
+        for index, pixel in enumerate(self.pixels):
+            board.set_pixel_raw_color(
+                pixel, self.rgb if index == position else self.background
+            )
+
+
+class Animator:
+    """
+    Render effects on a board at a fixed frame rate.
+
+    Attributes:
+        board (StatusBoard): Board the effects are rendered on.
+        frame_ms (int): Milliseconds between frames.
+        effects (list): Effects currently running.
+        frames (int): Count of frames rendered.
+    """
+
+    def __init__(self, board, fps=30):
+        self.board = board
+        self.frame_ms = 1000 // fps
+        self.effects = []
+        self.frames = 0
+        self._task = None
+
+    def add(self, effect):
+        """
+        Start an effect, replacing the running ones on the same pixels.
+
+        Args:
+            effect (Effect): Effect to be started.
+
+        Returns:
+            The effect given.
+        """
+        pixels = effect.pixels
+        for running in self.effects[:]:
+            for pixel in running.pixels:
+                if pixel in pixels:
+                    self.effects.remove(running)
+                    break
+        effect.start(self.board, ticks_ms())
+        self.effects.append(effect)
+        return effect
+
+    def remove(self, effect):
+        """
+        Stop an effect leaving its pixels as they are.
+
+        Args:
+            effect (Effect): Effect to be stopped.
+
+        Returns:
+            None.
+        """
+        if effect in self.effects:
+            self.effects.remove(effect)
+
+    def render(self, now=None):
+        """
+        Render a frame of all running effects with a single write.
+
+        Args:
+            now (int): `ticks_ms` value to render, current one if not given.
+
+        Returns:
+            None.
+        """
+        if now is None:
+            now = ticks_ms()
+        with self.board.batch():
+            for effect in self.effects[:]:
+                if not effect.render(self.board, now):
+                    self.effects.remove(effect)
+        self.frames += 1
+
+    async def run(self):
+        """
+        Render frames forever, sleeping the remaining time of each frame.
+
+        Returns:
+            None.
+        """
+        while True:
+            started = ticks_ms()
+            if self.effects:
+                self.render(started)
+            elapsed = ticks_diff(ticks_ms(), started)
+            await asyncio.sleep(max(0, self.frame_ms - elapsed) / 1000)
+
+    def start(self):
+        """
+        Create the task rendering the frames on the running event loop.
+
+        Returns:
+            The task created.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def stop(self):
+        """
+        Cancel the task rendering the frames.
+
+        Returns:
+            None.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
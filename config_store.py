@@ -0,0 +1,291 @@
+"""
+Flash friendly storage for the color of each pixel.
+
+Changes are kept in memory and written to flash only once they stop
+coming for a while (or after a maximum delay), so a burst of changes costs
+a single write. The colors are stored as a fixed size binary record which
+is first written to a temporary file and then renamed over the old one, so
+a power loss in the middle of a write leaves the previous record intact.
+
+Record layout::
+
+    b"USB1" | pixel count (uint16) | R, G, B per pixel | checksum (uint16)
+
+Configurations saved as JSON by older versions of `pixel_server.py` are
+still read and migrated to the binary record.
+"""
+import json
+import os
+import struct
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from time import ticks_diff
+from time import ticks_ms
+
+
+MAGIC = b"USB1"
+HEADER = "<4sH"
+HEADER_SIZE = struct.calcsize(HEADER)
+
+
+def checksum(data):
+    """
+    Compute the checksum stored at the end of the record.
+
+    Args:
+        data (bytes): Data to compute the checksum of.
+
+    Returns:
+        int: Checksum from 0 to 65535.
+    """
+    value = len(data)
+    for byte in data:
+        value = (value * 31 + byte) & 0xFFFF
+    return value
+
+
+def _exists(path):
+    """
+    Check whether a file exists.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        bool: True if the file exists.
+    """
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
+
+
+class ConfigStore:
+    """
+    Colors of each pixel stored on flash with coalesced writes.
+
+    Attributes:
+        pixels (int): Count of pixels stored.
+        path (str): File holding the binary record.
+        legacy_path (str): JSON file read when there is no binary record.
+        delay_ms (int): Milliseconds without changes before writing.
+        max_delay_ms (int): Longest time a change waits to be written.
+        colors (bytearray): Colors packed as R, G, B bytes for each pixel.
+        writes (int): Count of writes to flash.
+        changes (int): Count of changes made.
+    """
+
+    def __init__(
+        self,
+        pixels=4,
+        path="config.bin",
+        legacy_path="config.json",
+        delay_ms=2000,
+        max_delay_ms=10000,
+    ):
+        self.pixels = pixels
+        self.path = path
+        self.legacy_path = legacy_path
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.colors = bytearray(pixels * 3)
+        self.writes = 0
+        self.changes = 0
+        self._dirty = False
+        self._first_change = 0
+        self._last_change = 0
+
+    @property
+    def dirty(self):
+        """Whether there are changes not written to flash yet."""
+        return self._dirty
+
+    def get(self, pixel):
+        """
+        Get the color stored for a pixel.
+
+        Args:
+            pixel (int): Pixel number.
+
+        Returns:
+            Tuple with the color in (R, G, B) format.
+        """
+        offset = pixel * 3
+        return tuple(self.colors[offset : offset + 3])
+
+    def set(self, pixel, color):
+        """
+        Store the color of a pixel, it is written to flash later on.
+
+        The pixel and the color are checked before anything is stored.
+
+        Args:
+            pixel (int): Pixel number.
+            color (tuple): Color in (R, G, B) format.
+
+        Returns:
+            None.
+        """
+        if not 0 <= pixel < self.pixels:
+            raise IndexError("pixel out of range")
+        red, green, blue = color
+        if not (0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255):
+            raise ValueError("color out of range")
+        offset = pixel * 3
+        # Packed first, so a value which is not an integer changes nothing.
+        self.colors[offset : offset + 3] = bytes((red, green, blue))
+        self._changed()
+
+    def clear(self):
+        """
+        Store all pixels as turned off.
+
+        Returns:
+            None.
+        """
+        for index in range(len(self.colors)):
+            self.colors[index] = 0
+        self._changed()
+
+    def _changed(self):
+        """
+        Keep track of when the changes were made.
+
+        Returns:
+            None.
+        """
+        now = ticks_ms()
+        if not self._dirty:
+            self._dirty = True
+            self._first_change = now
+        self._last_change = now
+        self.changes += 1
+
+    def load(self):
+        """
+        Read the stored colors, falling back to the legacy JSON file.
+
+        A migrated JSON configuration is written as a binary record on the
+        next flush. Unreadable files leave all pixels turned off.
+
+        Returns:
+            bool: True if a stored configuration was found.
+        """
+        for path in (self.path, self.path + ".tmp"):
+            if _exists(path) and self._load_record(path):
+                return True
+
+        if _exists(self.legacy_path):
+            try:
+                with open(self.legacy_path, "r") as js_file:
+                    data = json.load(js_file)
+                for pixel, color in data.items():
+                    pixel = int(pixel)
+                    if 0 <= pixel < self.pixels:
+                        self.set(pixel, color)
+                return True
+            except (ValueError, TypeError, IndexError, OSError):
+                pass
+
+        return False
+
+    def _load_record(self, path):
+        """
+        Read a binary record.
+
+        Args:
+            path (str): Path of the record.
+
+        Returns:
+            bool: True if the record was valid.
+        """
+        try:
+            with open(path, "rb") as record_file:
+                record = record_file.read()
+        except OSError:
+            return False
+
+        if len(record) < HEADER_SIZE + 2:
+            return False
+        magic, pixels = struct.unpack_from(HEADER, record)
+        end = HEADER_SIZE + pixels * 3
+        if magic != MAGIC or len(record) != end + 2:
+            return False
+        data = record[HEADER_SIZE:end]
+        if struct.unpack_from("<H", record, end)[0] != checksum(data):
+            return False
+
+        size = min(len(data), len(self.colors))
+        self.colors[:size] = data[:size]
+        return True
+
+    def flush(self):
+        """
+        Write the colors to flash if there are pending changes.
+
+        Returns:
+            bool: True if the record was written.
+        """
+        if not self._dirty:
+            return False
+
+        data = bytes(self.colors)
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as record_file:
+            record_file.write(struct.pack(HEADER, MAGIC, self.pixels))
+            record_file.write(data)
+            record_file.write(struct.pack("<H", checksum(data)))
+
+        try:
+            os.rename(temp_path, self.path)
+        except OSError:
+            # FAT file systems do not rename over an existing file, the
+            # temporary file is read by `load` if power is lost right now.
+            os.remove(self.path)
+            os.rename(temp_path, self.path)
+
+        self._dirty = False
+        self.writes += 1
+        return True
+
+    def poll(self):
+        """
+        Write the colors if changes stopped coming or waited too long.
+
+        Returns:
+            bool: True if the record was written.
+        """
+        if not self._dirty:
+            return False
+        now = ticks_ms()
+        if (
+            ticks_diff(now, self._last_change) >= self.delay_ms
+            or ticks_diff(now, self._first_change) >= self.max_delay_ms
+        ):
+            return self.flush()
+        return False
+
+    async def run(self, interval_ms=250):
+        """
+        Check for pending changes forever.
+
+        A write which fails, e.g. with the flash full, is logged and the
+        changes stay pending, so it is retried on the next check.
+
+        Args:
+            interval_ms (int): Milliseconds between checks.
+
+        Returns:
+            None.
+        """
+        while True:
+            try:
+                self.poll()
+            except OSError as error:
+                print("Error writing %s: %r" % (self.path, error))
+            await asyncio.sleep(interval_ms / 1000)
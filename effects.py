@@ -0,0 +1,267 @@
+"""
+Procedural effects generated straight into a frame buffer.
+
+Each generator renders a whole frame per call into the same `bytearray`,
+already in the channel order of the strip, and shows it with a single
+`set_frame`. Given a seed, the random numbers generator is seeded on
+`reset` so the same frames come out on every run.
+
+    >>> rainbow = Rainbow(board, speed=2)
+    >>> while True:
+    ...     rainbow.show()
+    ...     time.sleep_ms(20)
+"""
+import math
+
+import urandom
+
+from status_board import _apply_lut
+
+# One period of a sine wave scaled to 0 - 255, the three channels of the
+# hue wheel are this wave shifted by a third of the period.
+WAVE = bytes(
+    int(127.5 + 127.5 * math.sin(2 * math.pi * index / 256)) for index in range(256)
+)
+
+
+class Generator:
+    """
+    Base class for the effects.
+
+    Subclasses implement `render` which writes the next frame on `frame`.
+
+    Attributes:
+        board (StatusBoard): Board the frames are shown on.
+        seed (int): Seed for the random numbers generator, None to not
+        seed it.
+        frame (bytearray): Last frame rendered in the channel order of the
+        strip.
+        frames (int): Count of frames rendered since the last reset.
+    """
+
+    def __init__(self, board, seed=None):
+        self.board = board
+        self.seed = seed
+        self.frame = bytearray(board.neopixels * 3)
+        self.frames = 0
+        self._order = board._order
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the frame and start the effect from the beginning.
+
+        Returns:
+            None.
+        """
+        if self.seed is not None:
+            urandom.seed(self.seed)
+        self.frames = 0
+        frame = self.frame
+        for index in range(len(frame)):
+            frame[index] = 0
+
+    def _pack(self, color):
+        """
+        Pack a color as a 24 bits integer in the channel order of the strip.
+
+        Args:
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            int: Packed color, the first channel on the highest byte.
+        """
+        if isinstance(color, str):
+            color = self.board.get_color(color)
+        packed = 0
+        for channel in range(3):
+            packed |= color[channel] << (16 - 8 * self._order[channel])
+        return packed
+
+    def _decay_table(self, level):
+        """
+        Build a table scaling every channel value by a level.
+
+        Args:
+            level (int): Level from 0 (off) to 256 (value as it is).
+
+        Returns:
+            bytearray: Table of 256 entries.
+        """
+        return bytearray(value * level >> 8 for value in range(256))
+
+    def render(self):
+        """
+        Render the next frame.
+
+        Returns:
+            bytearray: The frame.
+        """
+        raise NotImplementedError
+
+    def show(self):
+        """
+        Render the next frame and show it on the board.
+
+        Returns:
+            None.
+        """
+        self.board.set_frame(self.render(), raw=True)
+
+
+class RandomFill(Generator):
+    """
+    Random color on every pixel, from a single 24 bits draw per pixel.
+    """
+
+    def render(self):
+        """
+        Render the next frame.
+
+        Returns:
+            bytearray: The frame.
+        """
+        frame = self.frame
+        getrandbits = urandom.getrandbits
+        for offset in range(0, len(frame), 3):
+            value = getrandbits(24)
+            frame[offset] = value >> 16
+            frame[offset + 1] = value >> 8 & 0xFF
+            frame[offset + 2] = value & 0xFF
+        self.frames += 1
+        return frame
+
+
+class Rainbow(Generator):
+    """
+    Hue wheel spread over the strip and moving along it.
+
+    Attributes:
+        speed (int): Hue steps moved on each frame, out of 256.
+        spread (int): Hue steps covered by the whole strip, 256 shows the
+        whole wheel once.
+    """
+
+    def __init__(self, board, speed=1, spread=256, seed=None):
+        self.speed = speed
+        self.spread = spread
+        super().__init__(board, seed)
+
+    def render(self):
+        """
+        Render the next frame.
+
+        Returns:
+            bytearray: The frame.
+        """
+        frame = self.frame
+        red, green, blue = self._order[:3]
+        step = (self.spread << 8) // self.board.neopixels
+        hue = (self.frames * self.speed & 0xFF) << 8
+        for offset in range(0, len(frame), 3):
+            index = hue >> 8 & 0xFF
+            frame[offset + red] = WAVE[index]
+            frame[offset + green] = WAVE[(index + 85) & 0xFF]
+            frame[offset + blue] = WAVE[(index + 170) & 0xFF]
+            hue += step
+        self.frames += 1
+        return frame
+
+
+class Twinkle(Generator):
+    """
+    Pixels lighting up at random places and fading out.
+
+    Attributes:
+        color: Color of the pixels, a random one for each pixel if None.
+        density (int): Pixels lit on each frame for every 256 pixels.
+        fade (int): Level kept on each frame, out of 256.
+    """
+
+    def __init__(self, board, color=None, density=8, fade=224, seed=None):
+        self.color = color
+        self.density = density
+        self._lut = self._decay_table(fade)
+        self._pending = 0
+        super().__init__(board, seed)
+
+    def reset(self):
+        """
+        Clear the frame and start the effect from the beginning.
+
+        Returns:
+            None.
+        """
+        super().reset()
+        self._pending = 0
+
+    def render(self):
+        """
+        Render the next frame.
+
+        Returns:
+            bytearray: The frame.
+        """
+        frame = self.frame
+        size = len(frame)
+        _apply_lut(frame, frame, self._lut, 0, size)
+
+        pixels = self.board.neopixels
+        color = None if self.color is None else self._pack(self.color)
+        self._pending += pixels * self.density
+        while self._pending >= 256:
+            self._pending -= 256
+            value = urandom.getrandbits(24) if color is None else color
+            offset = urandom.getrandbits(16) % pixels * 3
+            frame[offset] = value >> 16
+            frame[offset + 1] = value >> 8 & 0xFF
+            frame[offset + 2] = value & 0xFF
+        self.frames += 1
+        return frame
+
+
+class Comet(Generator):
+    """
+    Pixel running along the strip leaving a fading tail.
+
+    Attributes:
+        color: Color of the comet.
+        speed (int): Pixels moved on each frame.
+    """
+
+    def __init__(self, board, color="white", length=8, speed=1, seed=None):
+        self.color = color
+        self.speed = speed
+        self._lut = self._decay_table(256 - 256 // max(length, 1))
+        self._head = -1
+        super().__init__(board, seed)
+
+    def reset(self):
+        """
+        Clear the frame and start the effect from the beginning.
+
+        Returns:
+            None.
+        """
+        super().reset()
+        self._head = -1
+
+    def render(self):
+        """
+        Render the next frame.
+
+        Returns:
+            bytearray: The frame.
+        """
+        frame = self.frame
+        size = len(frame)
+        value = self._pack(self.color)
+        for _ in range(self.speed):
+            _apply_lut(frame, frame, self._lut, 0, size)
+            self._head = (self._head + 1) % self.board.neopixels
+            offset = self._head * 3
+            frame[offset] = value >> 16
+            frame[offset + 1] = value >> 8 & 0xFF
+            frame[offset + 2] = value & 0xFF
+        self.frames += 1
+        return frame
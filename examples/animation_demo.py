@@ -0,0 +1,47 @@
+"""
+Example script running animations on the board while other
+work keeps going on the same event loop.
+
+The first two LEDs fade to green, the third one breathes in blue
+and the last one blinks in red while a dummy poller prints a
+message every second.
+"""
+import uasyncio
+
+from animation import Animator
+from animation import Blink
+from animation import Breathe
+from animation import FadeTo
+from status_board import StatusBoard
+
+
+async def poller():
+    """
+    Dummy task showing the loop is not blocked by the animations.
+
+    Returns:
+        None.
+    """
+    while True:
+        print("Still responsive")
+        await uasyncio.sleep(1)
+
+
+async def main():
+    """
+    Start the animations, on the running event loop, and the poller.
+
+    Returns:
+        None.
+    """
+    board = StatusBoard(auto_write=False)
+    animator = Animator(board, fps=30)
+    animator.add(FadeTo([0, 1], "green", duration=2000))
+    animator.add(Breathe([2], "blue", period=3000))
+    animator.add(Blink([3], "red", period=1000))
+    animator.start()
+    await poller()
+
+
+if __name__ == "__main__":
+    uasyncio.run(main())
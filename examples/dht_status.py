@@ -16,11 +16,13 @@ light up another led in `green` otherwise `red`
 
 """
 
-import time
-
 import dht
 import machine
+import uasyncio
 
+from sampling import idle
+from scheduler import DHTSource
+from scheduler import Scheduler
 from status_board import StatusBoard
 
 # Modify the variable value below
@@ -34,35 +36,37 @@ max_temp = 25
 min_hum = 30
 # Maximum humidity condition
 max_hum = 50
+# Readings used to smooth the measurement.
+window = 5
+# Margin around the limits before the color changes.
+band = 0.5
+# Sleep in low power mode between readings, nothing
+# else can run on the board while sleeping.
+low_power = False
 
 
 def main():
     board = StatusBoard()
     dht_sensor = dht.DHT11(machine.Pin(13))
 
-    while True:
-        dht_sensor.measure()
-        temperature = dht_sensor.temperature()
-        humidity = dht_sensor.humidity()
-
-        # If temperature is between min and max temp it is all good (green)
-        if min_temp < temperature < max_temp:
-            board.set_pixel_color(0, "green")
-        # If temperature is higher than max temp it is hot (red)
-        elif temperature < max_temp:
-            board.set_pixel_color(0, "red")
-        # If temperature is lower than min temp it is cold (blue)
-        else:
-            board.set_pixel_color(0, "blue")
-
-        # If humidity is between min and max it is all good (green)
-        if min_hum < humidity < max_hum:
-            board.set_pixel_color(2, "green")
-        # If humidity is higher than max it bad for us and potentially
-        # fuel for growth of harmful bacteria (red) and if it's lower
-        # we can get our eyes dry.
-        else:
-            board.set_pixel_color(2, "red")
+    source = DHTSource(
+        dht_sensor,
+        pixels=(0, 2),
+        min_temp=min_temp,
+        max_temp=max_temp,
+        min_hum=min_hum,
+        max_hum=max_hum,
+        window=window,
+        band=band,
+        interval=sleep_time,
+    )
+    scheduler = Scheduler(board)
+    # Temperature is shown on the first LED and humidity on the third one.
+    scheduler.add(source)
 
-        # Whit the statement above we don't do readings too often.
-        time.sleep(sleep_time)
+    if low_power:
+        while True:
+            uasyncio.run(scheduler.poll(source))
+            idle(sleep_time * 1000)
+    else:
+        uasyncio.run(scheduler.run())
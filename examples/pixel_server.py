@@ -1,18 +1,23 @@
-import gc
-import json
-import os
-import socket
+import sys
 import time
 
-import machine
+import uasyncio
 
+from config_store import ConfigStore
+from http_server import HTTPServer
+from http_server import json_response
+from metrics import Metrics
+from refresh import Refresher
 from status_board import StatusBoard
 
-html = """<!DOCTYPE html>
+# The page is kept in static chunks sent as they are, only the rows of the
+# table are rendered and they are cached until the pixel values change.
+html_head = b"""<!DOCTYPE html>
 <html>
     <head> <title>ESP8266 Pixels</title> </head>
     <body> <h1>ESP8266 Pixel values</h1>
-        <table border="1"> <tr><th>Pixel</th><th>Value</th><th>RGB</th></tr> %s </table>
+        <table border="1"> <tr><th>Pixel</th><th>Value</th><th>RGB</th></tr> """
+html_tail = b""" </table>
         <form action="/" method="get">
             <label for="pixel">Pixel number:</label>
             <input type="text" id="pixel" name="pixel"><br><br>
@@ -40,37 +45,20 @@ html = """<!DOCTYPE html>
 </html>
 """
 
-default_config = {0: [0, 0, 0], 1: [0, 0, 0], 2: [0, 0, 0], 3: [0, 0, 0]}
-
-config_file = "config.json"
 board = StatusBoard()
 board.clear_all()
 board.brightness = 16
-
-
-def save_config(config):
-    """Write configuration to a JSON file.
-
-    Args:
-        config (dict): Configuration used.
-    """
-    with open(config_file, "w") as js_file:
-        json.dump(config, js_file)
-
-
-def load_config():
-    """Get configuration from JSON file.
-
-    Returns:
-        dict: Configuration loaded.
-    """
-    with open(config_file, "r") as js_file:
-        try:
-            data = json.load(js_file)
-        except ValueError:
-            save_config(default_config)
-            machine.reset()
-    return data
+# The strip is written 30 times per second at most, whatever the requests do.
+refresher = Refresher(board, fps=30)
+# Counters and timings served on `/metrics`.
+metrics = Metrics()
+metrics.watch_board(board)
+metrics.watch(refresher.stats)
+server = HTTPServer(port=80, max_connections=4, timeout=5, metrics=metrics)
+# Pixel colors are written to flash once changes stop for 2 seconds.
+store = ConfigStore(pixels=board.neopixels, delay_ms=2000)
+metrics.watch(lambda: {"config_writes": store.writes})
+rows_cache = None
 
 
 def colorize(count=1, sleep_time=25):
@@ -96,18 +84,17 @@ def hex_to_rgb(value):
     """Convert hexadecimal string to rgb tuple
 
     Args:
-        value (str): Hexadecimal value to be converted
+        value (str): Hexadecimal value to be converted, as `#rrggbb`.
 
     Returns:
         tuple: (R,G,B)
-    """
-    if value.startswith("#"):
-        value = value.lstrip("#")
 
-    lv = len(value)
-    return tuple(
-        int(value[index : index + lv // 3], 16) for index in range(0, lv, lv // 3)
-    )
+    Raises:
+        ValueError: If the value is not in `#rrggbb` format.
+    """
+    if len(value) != 7 or value[0] != "#" or value[1:].strip("0123456789abcdefABCDEF"):
+        raise ValueError("invalid color %r" % value)
+    return (int(value[1:3], 16), int(value[3:5], 16), int(value[5:7], 16))
 
 
 def rgb_to_hex(rgb):
@@ -122,89 +109,234 @@ def rgb_to_hex(rgb):
     return "#%02x%02x%02x" % rgb
 
 
-def set_board_pixel_color(arguments, config):
+def invalidate_rows():
+    """Drop the rendered table rows so they are rendered on the next request."""
+    global rows_cache
+    rows_cache = None
+
+
+def render_rows():
+    """Render the table rows with the value of each pixel.
+
+    Returns:
+        bytes: Rows of the table, cached until `invalidate_rows` is called.
+    """
+    global rows_cache
+
+    if rows_cache is None:
+        rows = bytearray()
+        for pixel in range(board.neopixels):
+            pixel_value = store.get(pixel)
+            rows.extend(
+                (
+                    "<tr><td>%s</td><td>%s</td><td>%s</td></tr>\n"
+                    % (pixel, str(list(pixel_value)), rgb_to_hex(pixel_value))
+                ).encode()
+            )
+        rows_cache = bytes(rows)
+
+    return rows_cache
+
+
+def set_board_pixel_color(pixel, value):
     """Show a given color on a given pixel.
 
     Args:
-        arguments (str): String from the request with all data.
-        config (dict): Configuration used.
+        pixel (str): Pixel number from the request.
+        value (str): Hexadecimal color from the request.
     """
+    if not value.startswith("#"):
+        value = "#" + value
     try:
-        pixel = int(arguments[0])
-        value = hex_to_rgb(arguments[1:].replace("&value=", ""))
-        config[str(pixel)] = value
-        save_config(config)
+        pixel = int(pixel)
+        value = hex_to_rgb(value)
+        store.set(pixel, value)
+        invalidate_rows()
         board.set_pixel_raw_color(pixel, value)
-    except ValueError:
+    except (ValueError, IndexError):
         pass
 
 
-def main():
+@server.route("/")
+def index(request):
+    """Apply the changes on the query string and show the pixel values.
 
-    if config_file not in os.listdir():
-        save_config(default_config)
+    Args:
+        request (http_server.Request): Request received.
 
-    colorize(count=2)
-    current_config = load_config()
+    Returns:
+        tuple: Status, content type and the chunks of the page.
+    """
+    if "pixel" in request.query:
+        set_board_pixel_color(request.query["pixel"], request.query.get("value", ""))
 
-    for pixel in current_config.keys():
-        board.set_pixel_raw_color(int(pixel), tuple(current_config[pixel]))
+    elif request.query.get("cl") == "yes":
+        board.clear_all()
+        store.clear()
+        invalidate_rows()
 
-    addr = socket.getaddrinfo("0.0.0.0", 80)[0][-1]
-    s = socket.socket()
-    s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    s.bind(addr)
-    s.listen(5)
+    rows = render_rows()
+    return 200, "text/html", (html_head, rows, html_tail)
 
-    print("listening on", addr)
 
-    while True:
-        cl, addr = s.accept()
-        print("connection on", addr)
-        print("Free in: %d" % gc.mem_free())
-        cl_file = cl.makefile("rwb", 0)
+def parse_color(value):
+    """Get a color from a request value.
 
-        while True:
-            h = cl_file.readline()
-            gotten_msg = b"GET /?pixel="
-            clear = b"GET /?cl=yes"
+    Args:
+        value: Hexadecimal string (`#rrggbb`), name of a color on the board
+            or list with [R, G, B] values.
 
-            if gotten_msg in h:
-                msg = h.decode("utf-8").split("/?pixel=")
-                arguments = msg[1][:-11]
-                set_board_pixel_color(arguments, current_config)
+    Returns:
+        tuple: (R,G,B)
 
-            elif clear in h:
-                board.clear_all()
-                for pixel in range(board.neopixels):
-                    current_config[str(pixel)] = [0, 0, 0]
-                save_config(default_config)
+    Raises:
+        ValueError: If the value is not a valid color.
+        KeyError: If there is no color with that name.
+    """
+    if isinstance(value, str):
+        if value.startswith("#"):
+            return hex_to_rgb(value)
+        return board.get_color(value)
+
+    if (
+        not isinstance(value, list)
+        or len(value) != 3
+        or not all(
+            isinstance(channel, int)
+            and not isinstance(channel, bool)
+            and 0 <= channel < 256
+            for channel in value
+        )
+    ):
+        raise ValueError("invalid color %r" % (value,))
+    return tuple(value)
+
+
+def apply_changes(data):
+    """Apply many pixel changes with a single write on the board.
 
-            if h == b"" or h == b"\r\n":
-                break
+    Args:
+        data (dict): Changes to apply, it can have the keys:
+            `all`: Color for every pixel.
+            `pixels`: List with a color (or null) for each pixel, or
+                dictionary of colors by pixel number.
+            `brightness`: Brightness level of the board (0 - 255).
+            Pixel numbers: Color for that pixel.
+
+    Raises:
+        ValueError: If any change is malformed, nothing is applied then.
+        KeyError: If a color name is unknown, nothing is applied then.
+        IndexError: If a pixel is out of range, nothing is applied then.
+    """
+    # Every change is parsed and checked into `changes` first.
+    changes = []
+
+    if "all" in data:
+        color = parse_color(data["all"])
+        changes.extend((pixel, color) for pixel in range(board.neopixels))
+
+    pixels = data.get("pixels", {})
+    if isinstance(pixels, list):
+        pixels = [(pixel, color) for pixel, color in enumerate(pixels)]
+    elif isinstance(pixels, dict):
+        pixels = list(pixels.items())
+    else:
+        raise ValueError("pixels must be a list or an object")
+    pixels.extend((key, value) for key, value in data.items() if key.isdigit())
+
+    for pixel, color in pixels:
+        if color is None:
+            continue
+        pixel = int(pixel)
+        if not 0 <= pixel < board.neopixels:
+            raise IndexError("pixel %d out of range" % pixel)
+        changes.append((pixel, parse_color(color)))
+
+    brightness = data.get("brightness")
+    if brightness is not None:
+        brightness = int(brightness)
+        if not 0 <= brightness < 256:
+            raise ValueError("brightness out of range")
+
+    # Only then the board is changed, with a single write.
+    with board.batch():
+        for pixel, color in changes:
+            store.set(pixel, color)
+            board.set_pixel_raw_color(pixel, color)
+        if brightness is not None:
+            board.brightness = brightness
+    invalidate_rows()
+
+
+@server.route("/pixels")
+def get_pixels(request):
+    """Get the brightness and the color of every pixel.
 
-        rows = list()
+    Args:
+        request (http_server.Request): Request received.
+
+    Returns:
+        tuple: Status, content type and the JSON document.
+    """
+    pixels = [rgb_to_hex(store.get(pixel)) for pixel in range(board.neopixels)]
+    return json_response({"brightness": board.brightness, "pixels": pixels})
 
-        for pixel in range(board.neopixels):
-            pixel_value = current_config[str(pixel)]
-            rows.append(
-                "<tr><td>%s</td><td>%s</td><td>%s</td></tr>"
-                % (pixel, str(pixel_value), rgb_to_hex(tuple(pixel_value)))
-            )
 
-        response = html % "\n".join(rows)
+@server.route("/pixels", method="PUT")
+def put_pixels(request):
+    """Set many pixels at once from a JSON body and/or the query string.
 
-        try:
-            cl.sendall(response)
+    Example of body::
 
-        except OSError as error:
-            print("Error trying to send all information. %s" % error)
-            pass
+        {"pixels": {"0": "green", "5": "#ff0000"}, "brightness": 32}
 
-        finally:
-            cl.close()
+    Args:
+        request (http_server.Request): Request received.
+
+    Returns:
+        tuple: Status, content type and the JSON document with the result.
+    """
+    data = request.json()
+    if not isinstance(data, dict):
+        raise ValueError("a JSON object is expected")
+    data.update(request.query)
+    apply_changes(data)
+    return get_pixels(request)
+
+
+@server.route("/metrics")
+def get_metrics(request):
+    """Get the counters and timings of the board and the server as text.
+
+    Args:
+        request (http_server.Request): Request received.
+
+    Returns:
+        tuple: Status, content type and one `name value` line per metric.
+    """
+    return 200, "text/plain", metrics.render()
+
+
+async def serve():
+    """Run the HTTP server, the strip refresh and the task saving the
+    configuration."""
+    uasyncio.create_task(store.run())
+    if sys.implementation.name == "micropython":
+        refresher.start()
+    else:
+        # There is no hardware timer on the host, frames come from a task.
+        uasyncio.create_task(refresher.run())
+    await server.serve_forever()
+
+
+def main():
+    colorize(count=2)
+    store.load()
+    invalidate_rows()
+    board.set_frame(store.colors)
 
-        print("Free out: %d" % gc.mem_free())
+    print("listening on port", server.port)
+    uasyncio.run(serve())
 
 
 if __name__ == "__main__":
@@ -4,32 +4,35 @@ the button is pressed.
 
 In this script we are using a button connected to GPIO 0 on one end
 and the other end is connected to GND.
-"""
-import time
 
+The interrupt of the button only queues the press, the color is set
+afterwards on the main program so the strip is never written from
+the interrupt.
+"""
 import machine
 import urandom
 
+from inputs import Inputs
 from status_board import StatusBoard
 
 board = StatusBoard()
+inputs = Inputs()
 
 
-def change_random_led(pin):
+def change_random_led(button):
     """
     Callback function that will be called every time
     the button is pressed.
 
     Args:
-        pin: `machine.Pin` object.
+        button: `inputs.Button` object.
 
     Returns:
         None.
     """
-    time.sleep_ms(100)
     pixel = urandom.getrandbits(2)
     board.set_pixel_random_color(pixel)
 
 
 button = machine.Pin(0, machine.Pin.IN)
-button.irq(trigger=machine.Pin.IRQ_FALLING, handler=change_random_led)
+inputs.button(button, change_random_led, debounce_ms=100)
@@ -0,0 +1,90 @@
+"""
+Host stand-ins for the MicroPython modules used by the uStatusBoard.
+
+They allow running, timing and profiling the board code with CPython:
+
+    >>> import host
+    >>> host.install()
+    >>> from status_board import StatusBoard
+    >>> board = StatusBoard()
+    >>> board.neostrip.write_count
+    1
+
+`install` puts the stand-ins (`machine`, `micropython`, `neopixel`,
+`urandom`, `dht`, `uasyncio`) first on the import path and adds the MicroPython only
+functions of `time` (`ticks_ms`, `sleep_ms`, ...) and `gc` (`mem_free`,
+`mem_alloc`).
+
+`python3 -m host.repl` serves a fake raw REPL on a pseudo terminal to try
+`scripts/deploy.py` without a board.
+"""
+import gc
+import os
+import sys
+import time
+
+HOST_DIR = os.path.dirname(os.path.abspath(__file__))
+# Free heap of an ESP8266 once MicroPython has booted.
+HEAP_SIZE = 40 * 1024
+
+
+def _ticks_ms():
+    return time.monotonic_ns() // 1000000
+
+
+def _ticks_us():
+    return time.monotonic_ns() // 1000
+
+
+def _ticks_diff(new, old):
+    return new - old
+
+
+def _ticks_add(ticks, delta):
+    return ticks + delta
+
+
+def _sleep_ms(milliseconds):
+    time.sleep(milliseconds / 1000)
+
+
+def _sleep_us(microseconds):
+    time.sleep(microseconds / 1000000)
+
+
+def _mem_alloc():
+    import tracemalloc
+
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    return 0
+
+
+def _mem_free():
+    return max(0, HEAP_SIZE - _mem_alloc())
+
+
+def install():
+    """
+    Make the stand-ins importable in place of the MicroPython modules.
+
+    Returns:
+        None.
+    """
+    if HOST_DIR not in sys.path:
+        sys.path.insert(0, HOST_DIR)
+
+    for name, function in (
+        ("ticks_ms", _ticks_ms),
+        ("ticks_us", _ticks_us),
+        ("ticks_diff", _ticks_diff),
+        ("ticks_add", _ticks_add),
+        ("sleep_ms", _sleep_ms),
+        ("sleep_us", _sleep_us),
+    ):
+        if not hasattr(time, name):
+            setattr(time, name, function)
+
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = _mem_free
+        gc.mem_alloc = _mem_alloc
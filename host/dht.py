@@ -0,0 +1,51 @@
+"""
+Host stand-in for the MicroPython `dht` module.
+
+The values returned by the sensors are set with `set_reading`.
+"""
+
+
+class DHTBase:
+    """
+    Temperature and humidity sensor returning the values set on it.
+
+    Attributes:
+        pin (machine.Pin): Pin the sensor is connected to.
+        measures (int): Count of measurements taken.
+    """
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.measures = 0
+        self._reading = (20, 40)
+        self._measured = (0, 0)
+
+    def set_reading(self, temperature, humidity):
+        """
+        Set the values read on the next measurement.
+
+        Returns:
+            None.
+        """
+        self._reading = (temperature, humidity)
+
+    def measure(self):
+        """Take a measurement."""
+        self.measures += 1
+        self._measured = self._reading
+
+    def temperature(self):
+        """Return the temperature measured."""
+        return self._measured[0]
+
+    def humidity(self):
+        """Return the humidity measured."""
+        return self._measured[1]
+
+
+class DHT11(DHTBase):
+    """DHT11 sensor."""
+
+
+class DHT22(DHTBase):
+    """DHT22 sensor."""
@@ -0,0 +1,170 @@
+"""
+Host stand-in for the MicroPython `machine` module.
+"""
+_sleeps = []
+
+
+class Pin:
+    """
+    GPIO pin keeping its value in memory.
+
+    Attributes:
+        id: Pin identifier.
+        mode (int): Pin mode.
+        pull (int): Pull resistor.
+    """
+
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 1
+    IRQ_RISING = 2
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == self.PULL_UP else 0
+        self._handler = None
+        self._trigger = 0
+        if value is not None:
+            self._value = value
+
+    def __repr__(self):
+        return "Pin(%s)" % self.id
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+    def value(self, value=None):
+        """
+        Get or set the value of the pin.
+
+        Args:
+            value (int): Value to set, None to read it.
+
+        Returns:
+            int: Value of the pin when reading.
+        """
+        if value is None:
+            return self._value
+        self._set(1 if value else 0)
+
+    def on(self):
+        """Set the pin high."""
+        self._set(1)
+
+    def off(self):
+        """Set the pin low."""
+        self._set(0)
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        """
+        Register a handler called when the value of the pin changes.
+
+        Args:
+            handler: Function called with the pin.
+            trigger (int): Edges calling the handler.
+
+        Returns:
+            None.
+        """
+        self._handler = handler
+        self._trigger = trigger
+
+    def _set(self, value):
+        """
+        Change the value calling the IRQ handler on a matching edge, which
+        simulates a signal on an input pin.
+
+        Args:
+            value (int): New value.
+
+        Returns:
+            None.
+        """
+        previous = self._value
+        self._value = value
+        if self._handler is None or previous == value:
+            return
+        edge = self.IRQ_RISING if value else self.IRQ_FALLING
+        if self._trigger & edge:
+            self._handler(self)
+
+
+class Timer:
+    """
+    Timer without hardware behind, `fire` runs the callback by hand.
+
+    Attributes:
+        id (int): Timer identifier.
+        period (int): Milliseconds between calls.
+        mode (int): `ONE_SHOT` or `PERIODIC`.
+        callback: Function called with the timer.
+    """
+
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id=-1, **kwargs):
+        self.id = id
+        self.period = None
+        self.mode = self.PERIODIC
+        self.callback = None
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode=PERIODIC, period=-1, callback=None, freq=None):
+        """
+        Configure the timer.
+
+        Returns:
+            None.
+        """
+        self.mode = mode
+        self.period = 1000 // freq if freq else period
+        self.callback = callback
+
+    def deinit(self):
+        """Stop the timer."""
+        self.callback = None
+
+    def fire(self):
+        """
+        Run the callback as if the timer expired.
+
+        Returns:
+            None.
+        """
+        callback = self.callback
+        if self.mode == self.ONE_SHOT:
+            self.callback = None
+        if callback is not None:
+            callback(self)
+
+
+def lightsleep(milliseconds=None):
+    """Record the sleep request without sleeping."""
+    _sleeps.append(milliseconds)
+
+
+def deepsleep(milliseconds=None):
+    """Record the sleep request without sleeping."""
+    _sleeps.append(milliseconds)
+
+
+def reset():
+    """Reset is not possible on the host."""
+    raise SystemExit("machine.reset()")
+
+
+def freq(hz=None):
+    """Return the CPU frequency of an ESP8266."""
+    return 80000000
+
+
+def unique_id():
+    """Return a fixed identifier."""
+    return b"\x00\x00\x00\x00"
@@ -0,0 +1,50 @@
+"""
+Host stand-in for the MicroPython `micropython` module.
+
+Scheduled callbacks are queued as on the board, `run_scheduled` runs them
+as the MicroPython virtual machine would do between two bytecodes.
+"""
+_scheduled = []
+# Size of the queue of scheduled callbacks on MicroPython.
+SCHEDULE_DEPTH = 8
+
+
+def const(value):
+    """Return the value, as MicroPython does out of the compiler."""
+    return value
+
+
+def schedule(function, argument):
+    """
+    Queue a function to be called with an argument.
+
+    Args:
+        function: Function to be called.
+        argument: Argument given to the function.
+
+    Returns:
+        None.
+    """
+    if len(_scheduled) >= SCHEDULE_DEPTH:
+        raise RuntimeError("schedule queue full")
+    _scheduled.append((function, argument))
+
+
+def run_scheduled():
+    """
+    Call the queued functions.
+
+    Returns:
+        int: Count of functions called.
+    """
+    count = 0
+    while _scheduled:
+        function, argument = _scheduled.pop(0)
+        function(argument)
+        count += 1
+    return count
+
+
+def alloc_emergency_exception_buf(size):
+    """Nothing to allocate on the host."""
+
@@ -0,0 +1,100 @@
+"""
+Host stand-in for the MicroPython `neopixel` module.
+
+Every `write` is recorded together with the bytes sent and the time the
+WS2812 bitstream would take on the wire (about 30us per LED at 800kHz),
+during which the ESP8266 runs with interrupts disabled.
+"""
+import time
+
+# Microseconds to send one bit and the reset pulse closing each frame.
+BIT_TIME_US = 1.25
+RESET_TIME_US = 50
+
+
+class NeoPixel:
+    """
+    Strip of WS2812 LEDs recording what is written to it.
+
+    Attributes:
+        ORDER (tuple): Position of R, G, B (and W) in each pixel of `buf`.
+        pin (machine.Pin): Pin the strip is connected to.
+        n (int): Count of LEDs.
+        bpp (int): Bytes per pixel.
+        buf (bytearray): Bytes sent to the strip.
+        write_count (int): Count of writes.
+        bytes_written (int): Count of bytes sent.
+        wire_time_us (float): Time the writes would take on the wire.
+        frames (list): Copy of each frame written when `record` is True.
+        realtime (bool): Wait the wire time on each write.
+    """
+
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3, timing=1, record=False, realtime=False):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.timing = timing
+        self.buf = bytearray(n * bpp)
+        self.record = record
+        self.realtime = realtime
+        self.write_count = 0
+        self.bytes_written = 0
+        self.wire_time_us = 0.0
+        self.frames = []
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        offset = index * self.bpp
+        for i in range(self.bpp):
+            self.buf[offset + self.ORDER[i]] = value[i]
+
+    def __getitem__(self, index):
+        offset = index * self.bpp
+        return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
+
+    def fill(self, value):
+        """
+        Set all the pixels to the same color.
+
+        Args:
+            value (tuple): Color for all the pixels.
+
+        Returns:
+            None.
+        """
+        for index in range(self.n):
+            self[index] = value
+
+    def write(self):
+        """
+        Record a write of the whole buffer to the strip.
+
+        Returns:
+            None.
+        """
+        wire_time_us = len(self.buf) * 8 * BIT_TIME_US + RESET_TIME_US
+        self.write_count += 1
+        self.bytes_written += len(self.buf)
+        self.wire_time_us += wire_time_us
+        if self.record:
+            self.frames.append(bytes(self.buf))
+        if self.realtime:
+            deadline = time.perf_counter() + wire_time_us / 1000000
+            while time.perf_counter() < deadline:
+                pass
+
+    def reset_stats(self):
+        """
+        Clear the recorded writes.
+
+        Returns:
+            None.
+        """
+        self.write_count = 0
+        self.bytes_written = 0
+        self.wire_time_us = 0.0
+        self.frames = []
@@ -0,0 +1,169 @@
+"""
+Fake MicroPython REPL on a pseudo terminal, to try the deploy script
+without a board.
+
+It speaks the raw REPL protocol, raw paste mode included, and runs the code
+received with CPython inside a folder standing for the flash of the board.
+With `--legacy` it answers as firmware older than the raw paste mode:
+
+    $ python3 -m host.repl --root /tmp/board
+    /dev/pts/5
+"""
+import argparse
+import contextlib
+import io
+import os
+import pty
+import struct
+import traceback
+import tty
+
+BANNER = b"MicroPython on the host\r\n>>> "
+RAW_BANNER = b"raw REPL; CTRL-B to exit\r\n>"
+
+
+class FakeREPL:
+    """
+    REPL served on the master side of a pseudo terminal.
+
+    Attributes:
+        path (str): Path of the pseudo terminal to connect to.
+        raw_paste (bool): Whether the raw paste mode is supported.
+        legacy (bool): Whether to behave as firmware which does not know the
+        raw paste command, it only sees the Ctrl-A ending it and prints the
+        raw REPL banner again.
+        window (int): Bytes accepted before asking for flow control in raw
+        paste mode.
+        commands (int): Count of commands run.
+    """
+
+    def __init__(self, raw_paste=True, window=128, legacy=False):
+        self.raw_paste = raw_paste
+        self.legacy = legacy
+        self.window = window
+        self.commands = 0
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.path = os.ttyname(self._slave)
+        self._buffer = bytearray()
+        self._namespace = {}
+
+    def _read(self, size):
+        while len(self._buffer) < size:
+            self._buffer += os.read(self._master, 4096)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def _write(self, data):
+        os.write(self._master, data)
+
+    def _run(self, code):
+        """
+        Run a command sending its output and errors as the board does.
+
+        Args:
+            code (bytes): Code to be run.
+
+        Returns:
+            None.
+        """
+        output = io.StringIO()
+        error = ""
+        try:
+            with contextlib.redirect_stdout(output):
+                exec(code.decode(), self._namespace)
+        except Exception:
+            error = traceback.format_exc()
+        self.commands += 1
+        self._write(
+            output.getvalue().replace("\n", "\r\n").encode()
+            + b"\x04"
+            + error.replace("\n", "\r\n").encode()
+            + b"\x04>"
+        )
+
+    def _paste(self):
+        """
+        Receive a command in raw paste mode.
+
+        Returns:
+            None.
+        """
+        self._write(b"R\x01" + struct.pack("<H", self.window) + b"\x01")
+        code = bytearray()
+        received = 0
+        while True:
+            byte = self._read(1)
+            if byte == b"\x04":
+                self._write(b"\x04")
+                break
+            code += byte
+            received += 1
+            if received == self.window:
+                received = 0
+                self._write(b"\x01")
+        self._run(bytes(code))
+
+    def serve(self):
+        """
+        Answer forever.
+
+        Returns:
+            None.
+        """
+        raw = False
+        code = bytearray()
+        while True:
+            byte = self._read(1)
+            if not raw:
+                if byte == b"\x01":
+                    raw = True
+                    self._write(RAW_BANNER)
+                elif byte == b"\x03":
+                    self._write(b"\r\n>>> ")
+            elif byte == b"\x02":
+                raw = False
+                self._write(b"\r\n" + BANNER)
+            elif byte == b"\x01":
+                code = bytearray()
+                self._write(RAW_BANNER)
+            elif byte == b"\x05" and not code and not self.legacy:
+                self._read(2)
+                if self.raw_paste:
+                    self._paste()
+                else:
+                    self._write(b"R\x00")
+            elif byte == b"\x04":
+                self._write(b"OK")
+                self._run(bytes(code))
+                code = bytearray()
+            elif byte != b"\x03":
+                code += byte
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake MicroPython REPL on a pty.")
+    parser.add_argument("--root", default=".", help="Folder standing for the flash.")
+    parser.add_argument("--window", default=128, type=int, help="Raw paste window.")
+    parser.add_argument(
+        "--no-raw-paste", action="store_true", help="Only support the raw REPL."
+    )
+    parser.add_argument(
+        "--legacy", action="store_true", help="Not know the raw paste command."
+    )
+    options = parser.parse_args()
+
+    os.makedirs(options.root, exist_ok=True)
+    os.chdir(options.root)
+    repl = FakeREPL(
+        raw_paste=not options.no_raw_paste,
+        window=options.window,
+        legacy=options.legacy,
+    )
+    print(repl.path, flush=True)
+    repl.serve()
+
+
+if __name__ == "__main__":
+    main()
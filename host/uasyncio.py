@@ -0,0 +1,10 @@
+"""
+Host stand-in for the MicroPython `uasyncio` module, backed by asyncio.
+"""
+from asyncio import *  # noqa: F401,F403
+from asyncio import sleep
+
+
+def sleep_ms(milliseconds):
+    """Sleep for the given milliseconds."""
+    return sleep(milliseconds / 1000)
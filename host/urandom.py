@@ -0,0 +1,41 @@
+"""
+Host stand-in for the MicroPython `urandom` module.
+"""
+import random as _random
+
+_generator = _random.Random()
+
+
+def seed(value=None):
+    """Seed the generator to get a repeatable sequence."""
+    _generator.seed(value)
+
+
+def getrandbits(bits):
+    """Return an integer with the given count of random bits."""
+    return _generator.getrandbits(bits)
+
+
+def randint(a, b):
+    """Return a random integer from `a` to `b`, both included."""
+    return _generator.randint(a, b)
+
+
+def randrange(start, stop=None, step=1):
+    """Return a random integer from the range."""
+    return _generator.randrange(start, stop, step)
+
+
+def choice(sequence):
+    """Return a random element of the sequence."""
+    return _generator.choice(sequence)
+
+
+def random():
+    """Return a random float from 0 to 1."""
+    return _generator.random()
+
+
+def uniform(a, b):
+    """Return a random float from `a` to `b`."""
+    return _generator.uniform(a, b)
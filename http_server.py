@@ -0,0 +1,377 @@
+"""
+Small asynchronous HTTP server for the uStatusBoard.
+
+It is built on `uasyncio.start_server`, or the asyncio one of CPython on
+the host, so several clients are served at the same time and a slow or idle connection
+does not stall the others nor the LED updates running on the same loop.
+
+    >>> from http_server import HTTPServer
+    >>> server = HTTPServer(port=80)
+    >>> @server.route("/")
+    ... def index(request):
+    ...     return 200, "text/plain", b"Hello"
+    >>> uasyncio.run(server.serve_forever())
+"""
+import json
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+STATUS_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    414: "URI Too Long",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+def unquote(value):
+    """
+    Decode a percent-encoded value from a URL.
+
+    Args:
+        value (str): Value to be decoded, `+` are taken as spaces.
+
+    Returns:
+        str: Decoded value.
+    """
+    value = value.replace("+", " ")
+    if "%" not in value:
+        return value
+
+    parts = value.split("%")
+    decoded = bytearray(parts[0].encode())
+    for part in parts[1:]:
+        try:
+            decoded.append(int(part[:2], 16))
+            decoded.extend(part[2:].encode())
+        except ValueError:
+            decoded.extend(b"%" + part.encode())
+    return decoded.decode()
+
+
+def parse_query(query):
+    """
+    Parse a query string into a dictionary.
+
+    Args:
+        query (str): Query string without the leading `?`.
+
+    Returns:
+        dict: Values by name, the last one is kept for repeated names.
+    """
+    params = {}
+    for pair in query.split("&"):
+        if not pair:
+            continue
+        name, _, value = pair.partition("=")
+        params[unquote(name)] = unquote(value)
+    return params
+
+
+class Request:
+    """
+    Request received by the server.
+
+    Attributes:
+        method (str): HTTP method in upper case.
+        path (str): Path requested without the query string.
+        query (dict): Values from the query string.
+        headers (dict): Headers with lower case names.
+        body (bytes): Body of the request.
+    """
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        """
+        Parse the body of the request as JSON.
+
+        Returns:
+            Value parsed, an empty dictionary if there is no body.
+        """
+        if not self.body:
+            return {}
+        return json.loads(self.body.decode())
+
+
+def json_response(data, status=200):
+    """
+    Build a response with a JSON body.
+
+    Args:
+        data: Value to be serialized.
+        status (int): HTTP status code.
+
+    Returns:
+        Tuple with `(status, content_type, body)`.
+    """
+    return status, "application/json", json.dumps(data)
+
+
+class HTTPServer:
+    """
+    HTTP server dispatching requests to handlers by path and method.
+
+    Handlers receive a `Request` and return a tuple
+    `(status, content_type, body)` where the body is `bytes`, `str` or an
+    iterable of chunks written one by one. A `ValueError` raised by a
+    handler is answered with a `400` response.
+
+    Attributes:
+        host (str): Address to listen on.
+        port (int): Port to listen on.
+        max_connections (int): Connections served at the same time, others
+        get a `503` response once their request is read.
+        timeout (int): Seconds to wait for a client to send its request.
+        max_body (int): Largest body accepted in bytes.
+        max_line (int): Longest request line or header line accepted in
+        bytes.
+        max_headers (int): Most headers accepted on a request.
+        routes (dict): Handlers by `(method, path)`.
+        active (int): Connections being served.
+        served (int): Count of requests served.
+        metrics (metrics.Metrics): Registry getting the handling time of
+        each request and the count of responses by status, None to not
+        record them.
+    """
+
+    max_line = 512
+    max_headers = 16
+
+    def __init__(
+        self,
+        host="0.0.0.0",
+        port=80,
+        max_connections=4,
+        timeout=5,
+        max_body=1024,
+        metrics=None,
+    ):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_body = max_body
+        self.routes = {}
+        self.active = 0
+        self.served = 0
+        self.metrics = metrics
+        self._server = None
+
+    def route(self, path, method="GET"):
+        """
+        Register the decorated function as handler of a path.
+
+        Args:
+            path (str): Path to be handled.
+            method (str): HTTP method to be handled.
+
+        Returns:
+            Decorator registering the function.
+        """
+
+        def decorator(handler):
+            self.routes[(method, path)] = handler
+            return handler
+
+        return decorator
+
+    async def start(self):
+        """
+        Start listening for connections on the running event loop.
+
+        Returns:
+            None.
+        """
+        self._server = await asyncio.start_server(
+            self._serve, self.host, self.port, backlog=self.max_connections * 2
+        )
+
+    async def serve_forever(self):
+        """
+        Start the server and keep it running.
+
+        Returns:
+            None.
+        """
+        await self.start()
+        while True:
+            await asyncio.sleep(3600)
+
+    def close(self):
+        """
+        Stop listening for new connections.
+
+        Returns:
+            None.
+        """
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+    async def _read_request(self, reader):
+        """
+        Read the request line, headers and body from a client.
+
+        A request over the limits of the server raises an `OverflowError`
+        with the status code of the answer.
+
+        Args:
+            reader: Stream to read the request from.
+
+        Returns:
+            Request received or None if the connection was closed.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        if len(line) > self.max_line:
+            raise OverflowError(414)
+        method, target, _ = line.decode().split(" ", 2)
+        path, _, query = target.partition("?")
+
+        headers = {}
+        count = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"", b"\r\n", b"\n"):
+                break
+            count += 1
+            if len(line) > self.max_line or count > self.max_headers:
+                raise OverflowError(431)
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        body = b""
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body:
+            raise OverflowError(413)
+        if length:
+            body = await reader.readexactly(length)
+        return Request(method.upper(), path, parse_query(query), headers, body)
+
+    def _dispatch(self, request):
+        """
+        Call the handler for a request.
+
+        Args:
+            request (Request): Request to be handled.
+
+        Returns:
+            Tuple with `(status, content_type, body)`.
+        """
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            for method, path in self.routes:
+                if path == request.path:
+                    return 405, "text/plain", b"Method Not Allowed"
+            return 404, "text/plain", b"Not Found"
+        return handler(request)
+
+    async def _respond(self, writer, status, content_type, body):
+        """
+        Send a response to the client.
+
+        Args:
+            writer: Stream to write the response to.
+            status (int): HTTP status code.
+            content_type (str): Type of the body.
+            body: `bytes`, `str` or iterable of chunks.
+
+        Returns:
+            None.
+        """
+        if self.metrics is not None:
+            self.metrics.incr("http_status_%d" % status)
+        if isinstance(body, str):
+            body = body.encode()
+        head = "HTTP/1.0 %d %s\r\nContent-Type: %s\r\nConnection: close\r\n" % (
+            status,
+            STATUS_REASONS.get(status, ""),
+            content_type,
+        )
+        if isinstance(body, (bytes, bytearray)):
+            writer.write(("%sContent-Length: %d\r\n\r\n" % (head, len(body))).encode())
+            writer.write(body)
+            await writer.drain()
+        else:
+            writer.write((head + "\r\n").encode())
+            for chunk in body:
+                writer.write(chunk)
+                await writer.drain()
+
+    async def _serve(self, reader, writer):
+        """
+        Serve a single connection.
+
+        Args:
+            reader: Stream to read the request from.
+            writer: Stream to write the response to.
+
+        Returns:
+            None.
+        """
+        try:
+            if self.active >= self.max_connections:
+                # Closing with the request unread resets the connection and
+                # the client would never see the answer.
+                try:
+                    await asyncio.wait_for(self._read_request(reader), self.timeout)
+                except Exception:
+                    pass
+                await self._respond(writer, 503, "text/plain", b"Busy")
+                return
+
+            self.active += 1
+            try:
+                request = await asyncio.wait_for(
+                    self._read_request(reader), self.timeout
+                )
+                if request is not None:
+                    if self.metrics is not None:
+                        started = self.metrics.now()
+                    try:
+                        response = self._dispatch(request)
+                    except (ValueError, KeyError, IndexError) as error:
+                        response = (400, "text/plain", "Bad Request: %s" % error)
+                    except Exception as error:
+                        print("Error handling %s: %r" % (request.path, error))
+                        response = (500, "text/plain", b"Internal Server Error")
+                    await self._respond(writer, *response)
+                    self.served += 1
+                    if self.metrics is not None:
+                        self.metrics.since("http_request_us", started)
+                        self.metrics.sample_memory()
+            except asyncio.TimeoutError:
+                await self._respond(writer, 408, "text/plain", b"Timeout")
+            except OverflowError as error:
+                status = error.args[0]
+                await self._respond(
+                    writer, status, "text/plain", STATUS_REASONS[status]
+                )
+            except (ValueError, EOFError):
+                await self._respond(writer, 400, "text/plain", b"Bad Request")
+            finally:
+                self.active -= 1
+        except OSError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
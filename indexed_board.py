@@ -0,0 +1,374 @@
+"""
+Palette indexed variant of the `StatusBoard` for long strips.
+
+Each pixel keeps a single byte, the index of its color on a palette of up
+to 256 entries, instead of three bytes for the frame plus three for the
+copy of the last frame sent. The palette is kept already scaled by the
+brightness and gamma correction and it is expanded into the strip buffer
+only when writing, so changing the brightness or a palette entry recolors
+the whole strip without touching the pixels.
+
+    >>> board = IndexedStatusBoard(neopixels=300, brightness=32)
+    >>> board.color_all("green")
+    >>> board.set_pixel_color(5, "red")
+    >>> board.set_palette_color(board.palette_index("red"), (255, 64, 0))
+
+Frames given to `set_frame` hold palette indexes, so the `effects` and
+`segments` modules, which work on the RGB frame, do not apply to it.
+"""
+import sys
+from array import array
+
+import urandom
+
+from status_board import StatusBoard
+from status_board import _equal
+
+# Palette entries are already scaled, only the level of each pixel is left.
+_IDENTITY = bytes(range(256))
+
+if sys.implementation.name == "micropython":
+    import micropython
+
+    @micropython.viper
+    def _expand(out, indexes, palette, start: int, end: int):
+        """
+        Write the palette entry of each pixel into `out`.
+
+        Arguments as on the CPython version below.
+        """
+        dst = ptr8(out)  # noqa: F821
+        src = ptr8(indexes)  # noqa: F821
+        table = ptr8(palette)  # noqa: F821
+        pixel = start
+        while pixel < end:
+            entry = src[pixel] * 3
+            offset = pixel * 3
+            dst[offset] = table[entry]
+            dst[offset + 1] = table[entry + 1]
+            dst[offset + 2] = table[entry + 2]
+            pixel += 1
+
+else:
+
+    def _expand(out, indexes, palette, start, end):
+        """
+        Write the palette entry of each pixel into `out`.
+
+        Args:
+            out (bytearray): Buffer where the colors are written.
+            indexes (array): Palette index of each pixel.
+            palette (bytearray): Entries of 3 bytes each.
+            start (int): First pixel to expand.
+            end (int): Pixel after the last one to expand.
+
+        Returns:
+            None.
+        """
+        for pixel in range(start, end):
+            entry = indexes[pixel] * 3
+            out[pixel * 3 : pixel * 3 + 3] = palette[entry : entry + 3]
+
+
+class IndexedStatusBoard(StatusBoard):
+    """
+    StatusBoard keeping a palette index for each pixel.
+
+    Named colors take the first entries of the palette, raw colors get an
+    entry the first time they are used. Once the 256 entries are taken, a
+    new color gets an entry no pixel uses, named colors get one again when
+    they are used next.
+
+    Attributes:
+        indexes (array): Palette index of each pixel.
+        palette_size (int): Count of palette entries in use.
+    """
+
+    def _init_buffers(self):
+        """
+        Allocate the palette index of each pixel and the palette.
+
+        They take the place of the buffers of 3 bytes per pixel.
+
+        Returns:
+            None.
+        """
+        neopixels = self.neopixels
+        self.indexes = array("B", bytes(neopixels))
+        self._view = memoryview(self.indexes)
+        self._shadow = array("B", bytes(neopixels))
+        self._entries = bytearray(256 * 3)
+        self._scaled = bytearray(256 * 3)
+        self._index_of = {}
+        self.palette_size = 0
+
+    def _build_lut(self):
+        """
+        Build the brightness and gamma table and scale the palette with it.
+
+        Returns:
+            None.
+        """
+        super()._build_lut()
+        self._scale_palette(0, self.palette_size)
+
+    def _build_palette(self):
+        """
+        Scale every color on `colors` to full range values and give each one
+        an entry on the palette.
+
+        Returns:
+            None.
+        """
+        super()._build_palette()
+        for color in self._palette.values():
+            self.palette_index(color)
+
+    def _scale_palette(self, start, end):
+        """
+        Apply the brightness and gamma table to some palette entries, in the
+        channel order of the strip.
+
+        Args:
+            start (int): First entry.
+            end (int): Entry after the last one.
+
+        Returns:
+            None.
+        """
+        entries = self._entries
+        scaled = self._scaled
+        lut = self._lut
+        order = self._order
+        for offset in range(start * 3, end * 3, 3):
+            scaled[offset + order[0]] = lut[entries[offset]]
+            scaled[offset + order[1]] = lut[entries[offset + 1]]
+            scaled[offset + order[2]] = lut[entries[offset + 2]]
+
+    def palette_index(self, color):
+        """
+        Get the palette entry of a color, adding it if it is not there.
+
+        An index is only kept for the color while a pixel uses it.
+
+        Args:
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            int: Index of the entry.
+        """
+        if isinstance(color, str):
+            color = self.get_color(color)
+        color = (color[0], color[1], color[2])
+        index = self._index_of.get(color)
+        if index is None:
+            index = self.palette_size
+            if index < 256:
+                self.palette_size += 1
+            else:
+                index = self._unused_entry()
+            self._set_entry(index, color)
+        return index
+
+    def _unused_entry(self):
+        """
+        Find a palette entry which no pixel uses.
+
+        The entry may still be on the last frame sent, so the whole strip is
+        written on the next `show`.
+
+        Returns:
+            int: Index of the entry.
+        """
+        used = bytearray(256)
+        for index in self.indexes:
+            used[index] = 1
+        for index in range(256):
+            if not used[index]:
+                self._synced = False
+                return index
+        raise ValueError("the palette is full")
+
+    def _set_entry(self, index, color):
+        """
+        Store a color on a palette entry, in place of its previous one, and
+        scale it.
+
+        Args:
+            index (int): Index of the entry.
+            color (tuple): Color in (R, G, B) format.
+
+        Returns:
+            None.
+        """
+        offset = index * 3
+        old = tuple(self._entries[offset : offset + 3])
+        if self._index_of.get(old) == index:
+            del self._index_of[old]
+        self._entries[offset] = color[0]
+        self._entries[offset + 1] = color[1]
+        self._entries[offset + 2] = color[2]
+        self._index_of[color] = index
+        self._scale_palette(index, index + 1)
+
+    def set_palette_color(self, index, color):
+        """
+        Change the color of a palette entry, every pixel using it changes
+        on the next write.
+
+        Args:
+            index (int): Index of the entry.
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        if not 0 <= index < self.palette_size:
+            raise IndexError("palette entry not in use")
+        if isinstance(color, str):
+            color = self.get_color(color)
+        with self._change:
+            self._set_entry(index, (color[0], color[1], color[2]))
+            self._synced = False
+            self._write()
+
+    def show(self, force=False):
+        """
+        Send all pending changes to the strip in a single write.
+
+        The palette entry of each changed pixel is copied into the strip
+        buffer, nothing is sent if the indexes match the last frame sent.
+
+        Args:
+            force (bool): Write the whole frame even if it looks unchanged.
+
+        Returns:
+            None.
+        """
+        if force:
+            self._pending += 1
+            self._synced = False
+        if not self._pending:
+            return
+
+        self.writes_saved += self._pending - 1
+        self._pending = 0
+
+        if self._synced:
+            start, end = self._dirty_start // 3, self._dirty_end // 3
+        else:
+            start, end = 0, self.neopixels
+        self._dirty_start = self.neopixels * 3
+        self._dirty_end = 0
+
+        if self._synced and (
+            start >= end or _equal(self.indexes, self._shadow, start, end)
+        ):
+            self.writes_skipped += 1
+            return
+
+        memoryview(self._shadow)[start:end] = self._view[start:end]
+        self._synced = True
+        buf = self.neostrip.buf
+        _expand(buf, self.indexes, self._scaled, start, end)
+        if self.levels is not None:
+            self.levels.render(buf, buf, _IDENTITY, start, end)
+        self._send()
+
+    def fill(self, color):
+        """
+        Set a color on all LEDs on the board.
+
+        Args:
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        index = self.palette_index(color)
+        with self._change:
+            view = self._view
+            view[0] = index
+            filled = 1
+            size = len(view)
+            while filled < size:
+                chunk = min(filled, size - filled)
+                view[filled : filled + chunk] = view[:chunk]
+                filled += chunk
+            self._write()
+
+    def set_frame(self, frame, pixel=0, raw=False):
+        """
+        Copy palette indexes onto the strip.
+
+        Args:
+            frame (bytes): Palette index of each pixel.
+            pixel (int): Pixel where the frame starts.
+            raw (bool): Not used, kept for compatibility.
+
+        Returns:
+            None.
+        """
+        for index in frame:
+            if index >= self.palette_size:
+                raise IndexError("palette entry not in use")
+        with self._change:
+            self._view[pixel : pixel + len(frame)] = frame
+            self._write(pixel, pixel + len(frame))
+
+    def set_pixel_index(self, pixel, index):
+        """
+        Set a palette entry on a pixel.
+
+        Args:
+            pixel (int): Pixel number.
+            index (int): Index of the palette entry.
+
+        Returns:
+            None.
+        """
+        pixel = self._pixel_index(pixel)
+        if not 0 <= index < self.palette_size:
+            raise IndexError("palette entry not in use")
+        with self._change:
+            self.indexes[pixel] = index
+            self._write(pixel, pixel + 1)
+
+    def set_pixel_random_color(self, pixel):
+        """
+        Set a random color of the palette on a pixel.
+
+        Args:
+            pixel (int): Led position on the board.
+
+        Returns:
+            None.
+        """
+        self.set_pixel_index(pixel, urandom.getrandbits(8) % self.palette_size)
+
+    def get_pixel_raw_color(self, pixel):
+        """
+        Return the value of the given pixel in [R, G, B] format.
+
+        Args:
+            pixel (int): Pixel number
+
+        Returns:
+            Tuple with the color set on the pixel.
+        """
+        offset = self.indexes[self._pixel_index(pixel)] * 3
+        entries = self._entries
+        return (entries[offset], entries[offset + 1], entries[offset + 2])
+
+    def _set_pixel(self, pixel, color):
+        """
+        Store the palette index of a color on a pixel.
+
+        Args:
+            pixel (int): Position of the pixel, already checked.
+            color (list): Color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        self.indexes[pixel] = self.palette_index(color)
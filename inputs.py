@@ -0,0 +1,263 @@
+"""
+IRQ safe handling of buttons.
+
+The pin interrupt only starts a one shot debounce timer. When the timer
+expires the pin is read again and, if the button is still pressed, its
+number is pushed into a preallocated ring buffer. Nothing is allocated in
+interrupt context and the LEDs are never written from it.
+
+The handlers run later on the main program, through `micropython.schedule`
+by default or from an asyncio task with `Inputs.run`. Each handler is
+called once per dispatch, no matter how many presses were queued.
+
+    >>> inputs = Inputs()
+    >>> inputs.button(machine.Pin(0, machine.Pin.IN), on_press, debounce_ms=50)
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+import machine
+import micropython
+
+# Room to report exceptions raised in interrupt context.
+micropython.alloc_emergency_exception_buf(100)
+
+
+class EventQueue:
+    """
+    Ring buffer of small integers, pushed from interrupts and popped from
+    the main program.
+
+    Only `push` changes the head and only `pop` changes the tail, so one
+    producer and one consumer do not need to disable interrupts.
+
+    Attributes:
+        dropped (int): Count of events dropped because the queue was full.
+    """
+
+    def __init__(self, size=16):
+        self._events = bytearray(size)
+        self._head = 0
+        self._tail = 0
+        self.dropped = 0
+
+    def __len__(self):
+        return (self._head - self._tail) % len(self._events)
+
+    def push(self, value):
+        """
+        Add an event, safe to be called from an interrupt.
+
+        Args:
+            value (int): Event from 0 to 255.
+
+        Returns:
+            bool: False if the queue is full and the event was dropped.
+        """
+        head = self._head
+        following = head + 1
+        if following == len(self._events):
+            following = 0
+        if following == self._tail:
+            self.dropped += 1
+            return False
+        self._events[head] = value
+        self._head = following
+        return True
+
+    def pop(self):
+        """
+        Take the oldest event.
+
+        Returns:
+            int: Event, -1 if the queue is empty.
+        """
+        tail = self._tail
+        if tail == self._head:
+            return -1
+        value = self._events[tail]
+        tail += 1
+        if tail == len(self._events):
+            tail = 0
+        self._tail = tail
+        return value
+
+
+class Button:
+    """
+    Button on a pin, debounced with a one shot timer.
+
+    Attributes:
+        pin (machine.Pin): Pin the button is connected to.
+        handler: Function called with the button on the main program after
+        it is pressed.
+        debounce_ms (int): Milliseconds the pin must settle before reading
+        it.
+        active (int): Value of the pin while the button is pressed.
+        index (int): Number of the button on the queue.
+        presses (int): Count of presses seen.
+    """
+
+    def __init__(
+        self, inputs, index, pin, handler, debounce_ms=50, active=0, timer_id=-1
+    ):
+        self.pin = pin
+        self.handler = handler
+        self.debounce_ms = debounce_ms
+        self.active = active
+        self.index = index
+        self.presses = 0
+        self._inputs = inputs
+        self._timer = machine.Timer(timer_id)
+        self._waiting = False
+        # Bound methods are created once, creating them in an IRQ allocates.
+        self._irq_ref = self._irq
+        self._settled_ref = self._settled
+        trigger = machine.Pin.IRQ_RISING if active else machine.Pin.IRQ_FALLING
+        pin.irq(trigger=trigger, handler=self._irq_ref)
+
+    def _irq(self, pin):
+        """
+        Start the debounce timer on the first edge, the edges of bounces
+        coming after it are ignored.
+
+        Args:
+            pin (machine.Pin): Pin which changed.
+
+        Returns:
+            None.
+        """
+        if not self._waiting:
+            self._waiting = True
+            self._timer.init(
+                mode=machine.Timer.ONE_SHOT,
+                period=self.debounce_ms,
+                callback=self._settled_ref,
+            )
+
+    def _settled(self, timer):
+        """
+        Queue a press if the button is still pressed once settled.
+
+        Args:
+            timer (machine.Timer): Debounce timer.
+
+        Returns:
+            None.
+        """
+        self._waiting = False
+        if self.pin.value() == self.active:
+            self._inputs._post(self.index)
+
+
+class Inputs:
+    """
+    Queue of input events and the handlers for them.
+
+    Attributes:
+        queue (EventQueue): Events waiting to be handled.
+        buttons (list): Buttons registered.
+        scheduled (bool): Whether handlers run through
+        `micropython.schedule`, it is disabled by `run`.
+    """
+
+    def __init__(self, size=16, scheduled=True):
+        self.queue = EventQueue(size)
+        self.buttons = []
+        self.scheduled = scheduled
+        self._pending = False
+        self._dispatch_ref = self._scheduled_dispatch
+
+    def button(self, pin, handler, debounce_ms=50, active=0, timer_id=-1):
+        """
+        Register a button.
+
+        Args:
+            pin (machine.Pin): Pin the button is connected to.
+            handler: Function called with the button after it is pressed.
+            debounce_ms (int): Milliseconds the pin must settle.
+            active (int): Value of the pin while the button is pressed.
+            timer_id (int): Timer used to debounce, -1 for a virtual one.
+
+        Returns:
+            Button: Button registered.
+        """
+        button = Button(
+            self, len(self.buttons), pin, handler, debounce_ms, active, timer_id
+        )
+        self.buttons.append(button)
+        return button
+
+    def _post(self, index):
+        """
+        Queue an event and schedule its handling, called in interrupt
+        context.
+
+        Args:
+            index (int): Number of the button.
+
+        Returns:
+            None.
+        """
+        self.queue.push(index)
+        if self.scheduled and not self._pending:
+            self._pending = True
+            try:
+                micropython.schedule(self._dispatch_ref, 0)
+            except RuntimeError:
+                # The schedule queue is full, the next event retries.
+                self._pending = False
+
+    def _scheduled_dispatch(self, _):
+        """
+        Handle the events, called through `micropython.schedule`.
+
+        Returns:
+            None.
+        """
+        self._pending = False
+        self.dispatch()
+
+    def dispatch(self):
+        """
+        Call the handler of every button pressed since the last call, once
+        per button.
+
+        Returns:
+            int: Count of events handled.
+        """
+        pressed = 0
+        count = 0
+        while True:
+            index = self.queue.pop()
+            if index < 0:
+                break
+            self.buttons[index].presses += 1
+            pressed |= 1 << index
+            count += 1
+
+        for button in self.buttons:
+            if pressed >> button.index & 1:
+                try:
+                    button.handler(button)
+                except Exception as error:
+                    print("Error handling %s: %r" % (button.pin, error))
+        return count
+
+    async def run(self, interval_ms=20):
+        """
+        Handle the events from an asyncio task instead of through
+        `micropython.schedule`.
+
+        Args:
+            interval_ms (int): Milliseconds between checks.
+
+        Returns:
+            None.
+        """
+        self.scheduled = False
+        while True:
+            self.dispatch()
+            await asyncio.sleep(interval_ms / 1000)
@@ -0,0 +1,458 @@
+"""
+Asynchronous Jenkins client for the uStatusBoard.
+
+The status of many jobs is polled at the same time over a few persistent
+(keep-alive) connections to the Jenkins host, each request with its own
+timeout, and all the resulting colors are applied on the board in a single
+update. The status of all the jobs in a folder or view can also be read
+with a single request.
+
+Only the needed fields are requested using the `tree` parameter of the
+Jenkins API, and responses are parsed as they arrive so memory use does not
+depend on the size of the documents sent by the server.
+
+    >>> jenkins = Jenkins("jenkins.local", 8080, user="user", password="token")
+    >>> uasyncio.run(jenkins.update_board(board, {0: "job/project1"}))
+    >>> uasyncio.run(jenkins.update_board(board, {0: "project1"}, folder=""))
+"""
+from json_stream import JSONScanner
+
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+
+class HTTPConnection:
+    """
+    HTTP/1.1 connection kept open between requests to the same host.
+
+    Attributes:
+        host (str): Host to connect to.
+        port (int): Port to connect to.
+        requests (int): Count of requests sent on this connection.
+        connects (int): Count of times the connection was opened.
+        error_prefix (int): Bytes kept from the body of an error response.
+    """
+
+    chunk_size = 256
+    error_prefix = 128
+
+    def __init__(self, host, port=80):
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.connects = 0
+        self._reader = None
+        self._writer = None
+
+    async def _open(self):
+        """
+        Open the connection if it is not already open.
+
+        Returns:
+            bool: True if an already open connection is reused.
+        """
+        if self._writer is not None:
+            return True
+        self._reader, self._writer = await asyncio.open_connection(
+            self.host, self.port
+        )
+        self.connects += 1
+        return False
+
+    def close(self):
+        """
+        Close the connection, it is opened again on the next request.
+
+        Returns:
+            None.
+        """
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except OSError:
+                pass
+        self._reader = None
+        self._writer = None
+
+    async def request(self, path, headers=None, new_sink=None):
+        """
+        Send a GET request and read the whole response.
+
+        A request on a reused connection which the server already closed is
+        sent again on a new connection. The connection is closed whenever a
+        response is not read to its end, whatever the reason.
+
+        Args:
+            path (str): Path (and query string) requested.
+            headers (dict): Extra headers to send.
+            new_sink: Function returning the function called with each chunk
+            of a successful response body, instead of keeping the body in
+            memory. It is called again if the request is sent again, so the
+            body is parsed from its start.
+
+        Returns:
+            Tuple with the status code and the body, None if a sink is used
+            and only its first `error_prefix` bytes if the status is not 200.
+        """
+        reused = await self._open()
+        try:
+            return await self._request(path, headers, new_sink)
+        except (OSError, EOFError):
+            if not reused:
+                raise
+        await self._open()
+        return await self._request(path, headers, new_sink)
+
+    async def _request(self, path, headers, new_sink):
+        """
+        Send a GET request on the open connection.
+
+        Args:
+            path (str): Path (and query string) requested.
+            headers (dict): Extra headers to send.
+            new_sink: Function returning the function called with each
+            chunk of the body.
+
+        Returns:
+            Tuple with the status code and the body.
+        """
+        try:
+            return await self._exchange(path, headers, new_sink)
+        except BaseException:
+            # Failed, timed out or cancelled, part of the response may be
+            # left unread and it would be read as the answer to the next
+            # request.
+            self.close()
+            raise
+
+    async def _exchange(self, path, headers, new_sink):
+        """
+        Write the request and read the response, see `_request`.
+
+        Returns:
+            Tuple with the status code and the body.
+        """
+        lines = [
+            "GET %s HTTP/1.1" % path,
+            "Host: %s" % self.host,
+            "Connection: keep-alive",
+        ]
+        for name, value in (headers or {}).items():
+            lines.append("%s: %s" % (name, value))
+        self._writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+        await self._writer.drain()
+        self.requests += 1
+
+        reader = self._reader
+        line = await reader.readline()
+        if not line:
+            raise EOFError
+        status = int(line.split(None, 2)[1])
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"", b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode().partition(":")
+            response_headers[name.strip().lower()] = value.strip().lower()
+
+        body = None
+        if status != 200:
+            # Error pages can be large, only their start is kept.
+            body = bytearray()
+
+            def sink(chunk):
+                room = self.error_prefix - len(body)
+                if room > 0:
+                    body.extend(chunk[:room])
+
+        elif new_sink is None:
+            body = bytearray()
+            sink = body.extend
+        else:
+            sink = new_sink()
+
+        if response_headers.get("transfer-encoding") == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await self._read_body(size, sink)
+                await reader.readline()
+                if not size:
+                    break
+        elif "content-length" in response_headers:
+            await self._read_body(int(response_headers["content-length"]), sink)
+        else:
+            await self._read_body(-1, sink)
+            response_headers["connection"] = "close"
+
+        if response_headers.get("connection") == "close":
+            self.close()
+        return status, body
+
+    async def _read_body(self, size, sink):
+        """
+        Read part of the body in small chunks passing them to the sink.
+
+        Args:
+            size (int): Bytes to read, -1 to read until the connection closes.
+            sink: Function called with each chunk.
+
+        Returns:
+            None.
+        """
+        while size:
+            chunk = await self._reader.read(
+                self.chunk_size if size < 0 else min(size, self.chunk_size)
+            )
+            if not chunk:
+                if size < 0:
+                    return
+                raise EOFError
+            sink(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+
+class Jenkins:
+    """
+    Client polling the build status of Jenkins jobs.
+
+    Attributes:
+        host (str): Jenkins host.
+        port (int): Jenkins port.
+        timeout (int): Seconds to wait for each request.
+        max_connections (int): Connections used at the same time.
+        status_color (dict): Match between color and statuses.
+        unknown_color (str): Color used when the status can not be read.
+    """
+
+    last_build = "/{job}/lastBuild/api/json?tree=result"
+    folder_jobs = "/{folder}api/json?tree=jobs%5Bname,lastBuild%5Bresult%5D%5D"
+    status_color = {
+        "FAILURE": "red",
+        "SUCCESS": "yellow",
+        "UNSTABLE": "green",
+    }
+    unknown_color = "nocolor"
+
+    def __init__(
+        self, host, port=80, user=None, password=None, timeout=5, max_connections=2
+    ):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.headers = {"Accept": "application/json"}
+        self._connections = []
+        self.set_authorization(user, password)
+
+    def set_authorization(self, user, password):
+        """
+        Set the basic authorization header sent on each request.
+
+        Args:
+            user (str): Username.
+            password (str): Password or API token.
+
+        Returns:
+            None.
+        """
+        if user is not None and password is not None:
+            credentials = ("%s:%s" % (user, password)).encode()
+            self.headers["Authorization"] = (
+                "Basic " + binascii.b2a_base64(credentials).decode().strip()
+            )
+        else:
+            self.headers.pop("Authorization", None)
+
+    def get_status_color(self, status):
+        """
+        Based on a status return its color assigned.
+
+        Args:
+            status (str): status to look the color for.
+
+        Returns:
+            String with the color assigned to the status.
+        """
+        return self.status_color.get(status, self.unknown_color)
+
+    def _connection(self, index):
+        """
+        Get one of the persistent connections, creating it if needed.
+
+        Args:
+            index (int): Number of the connection.
+
+        Returns:
+            HTTPConnection: Connection to the Jenkins host.
+        """
+        while len(self._connections) <= index:
+            self._connections.append(HTTPConnection(self.host, self.port))
+        return self._connections[index]
+
+    def close(self):
+        """
+        Close all the connections.
+
+        Returns:
+            None.
+        """
+        for connection in self._connections:
+            connection.close()
+
+    async def get_build_status(self, job, connection=None):
+        """
+        Make an HTTP request to jenkins API and retrieve the build
+        information to look for the build status on it.
+
+        Args:
+            job (str): Job path, e.g. `job/project1`.
+            connection (HTTPConnection): Connection to use, the first one
+            if not given.
+
+        Returns:
+            String with the `result` attribute on response.
+        """
+        if connection is None:
+            connection = self._connection(0)
+        result = []
+
+        def handler(path, value):
+            if path == ["result"]:
+                result.append(value)
+
+        def new_sink():
+            result.clear()
+            return JSONScanner(handler).feed
+
+        status, _ = await connection.request(
+            self.last_build.format(job=job.strip("/")), self.headers, new_sink
+        )
+        if status != 200:
+            raise ValueError("HTTP %d for %s" % (status, job))
+        return result[0] if result else None
+
+    async def get_folder_status(self, folder=""):
+        """
+        Retrieve the last build status of every job in a folder or view
+        with a single request.
+
+        Args:
+            folder (str): Path of the folder or view, e.g. `job/team` or
+            `view/nightly`, the root of Jenkins if empty.
+
+        Returns:
+            dict: Status by job name, None for jobs without builds.
+        """
+        folder = folder.strip("/")
+        if folder:
+            folder += "/"
+        results = {}
+        names = []
+
+        def handler(path, value):
+            if len(path) == 3 and path[2] == "name":
+                names.append(value)
+                results[value] = None
+            elif len(path) == 4 and path[2] == "lastBuild" and path[3] == "result":
+                results[names[-1]] = value
+
+        def new_sink():
+            results.clear()
+            names.clear()
+            return JSONScanner(handler).feed
+
+        status, _ = await asyncio.wait_for(
+            self._connection(0).request(
+                self.folder_jobs.format(folder=folder), self.headers, new_sink
+            ),
+            self.timeout,
+        )
+        if status != 200:
+            raise ValueError("HTTP %d for %s" % (status, folder))
+        return results
+
+    async def _worker(self, connection, jobs, results):
+        """
+        Poll jobs from a shared list until it is empty.
+
+        Args:
+            connection (HTTPConnection): Connection used by this worker.
+            jobs (list): Jobs still to be polled.
+            results (dict): Status by job where the results are stored.
+
+        Returns:
+            None.
+        """
+        while jobs:
+            job = jobs.pop()
+            try:
+                results[job] = await asyncio.wait_for(
+                    self.get_build_status(job, connection), self.timeout
+                )
+            except Exception as error:
+                # A request which was not read to its end closed the
+                # connection, only an error status leaves it open, and
+                # reusable, once the whole response was read.
+                print("Error polling %s: %r" % (job, error))
+                results[job] = None
+
+    async def poll(self, jobs):
+        """
+        Get the build status of many jobs at the same time.
+
+        Args:
+            jobs (list): Job paths to be polled.
+
+        Returns:
+            dict: Status by job, None for the jobs that could not be read.
+        """
+        pending = list(jobs)
+        results = {}
+        workers = min(self.max_connections, len(pending))
+        await asyncio.gather(
+            *[
+                self._worker(self._connection(index), pending, results)
+                for index in range(workers)
+            ]
+        )
+        return results
+
+    async def update_board(self, board, jobs, folder=None):
+        """
+        Poll the jobs and show their status on the board in a single update.
+
+        Args:
+            board (StatusBoard): Board where the status is shown.
+            jobs (dict): Job path by pixel number, or job name if a folder
+            is given.
+            folder (str): Folder or view holding all the jobs, read with a
+            single request.
+
+        Returns:
+            dict: Status by job.
+        """
+        if folder is None:
+            results = await self.poll(set(jobs.values()))
+        else:
+            try:
+                results = await self.get_folder_status(folder)
+            except Exception as error:
+                print("Error polling %s: %r" % (folder, error))
+                self._connection(0).close()
+                results = {}
+        for job in jobs.values():
+            results.setdefault(job, None)
+        with board.batch():
+            for pixel, job in jobs.items():
+                board.set_pixel_color(pixel, self.get_status_color(results[job]))
+        return results
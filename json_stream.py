@@ -0,0 +1,236 @@
+"""
+Incremental JSON scanner with bounded memory use.
+
+The document is fed in chunks as they arrive from the network and every
+scalar value found is reported with its path, so only the values of
+interest are kept, no matter how large the document is.
+
+    >>> def handler(path, value):
+    ...     if path[-1] == "result":
+    ...         print(value)
+    >>> scanner = JSONScanner(handler)
+    >>> scanner.feed(b'{"result": "SUCC')
+    >>> scanner.feed(b'ESS", "number": 12}')
+    SUCCESS
+"""
+
+ESCAPES = {
+    ord("b"): ord("\b"),
+    ord("f"): ord("\f"),
+    ord("n"): ord("\n"),
+    ord("r"): ord("\r"),
+    ord("t"): ord("\t"),
+}
+LITERALS = {"true": True, "false": False, "null": None}
+WHITESPACE = b" \t\r\n"
+# U+FFFD in UTF-8, taking the place of surrogates without their pair.
+REPLACEMENT = b"\xef\xbf\xbd"
+
+
+def _complete(token):
+    """
+    Drop the last character of a truncated string if it was cut.
+
+    Args:
+        token (bytearray): UTF-8 encoded string.
+
+    Returns:
+        bytearray: String ending on a character boundary.
+    """
+    index = len(token) - 1
+    # Step back over the continuation bytes to the first byte of the
+    # character.
+    while index > 0 and token[index] & 0xC0 == 0x80:
+        index -= 1
+    if index < 0:
+        return token
+    lead = token[index]
+    size = 1 if lead < 0xC0 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    if len(token) - index < size:
+        return token[:index]
+    return token
+
+
+class JSONScanner:
+    """
+    Scan a JSON document reporting each scalar value with its path.
+
+    The path is a list with the key for objects and the index for arrays,
+    e.g. `["jobs", 2, "name"]`. The same list is reused for every value so
+    the handler must copy it to keep it.
+
+    Attributes:
+        handler: Function called with `(path, value)` for each scalar.
+        max_string (int): Longest string kept, in bytes of UTF-8. Longer
+        ones are truncated on a character boundary.
+        path (list): Path of the value being scanned.
+    """
+
+    def __init__(self, handler, max_string=128):
+        self.handler = handler
+        self.max_string = max_string
+        self.path = []
+        self._containers = bytearray()
+        self._token = bytearray()
+        self._in_string = False
+        self._escape = False
+        self._room = max_string
+        self._digits = 0
+        self._code = 0
+        self._high = 0
+        self._expect_key = False
+
+    def feed(self, chunk):
+        """
+        Scan the next chunk of the document.
+
+        Args:
+            chunk (bytes): Part of the document.
+
+        Returns:
+            None.
+        """
+        for char in chunk:
+            if self._in_string:
+                self._string_char(char)
+            elif char == 0x22:  # "
+                self._in_string = True
+                self._room = self.max_string
+            elif char in WHITESPACE:
+                self._end_literal()
+            elif char == 0x7B or char == 0x5B:  # { [
+                self._containers.append(char)
+                self.path.append(None if char == 0x7B else 0)
+                self._expect_key = char == 0x7B
+            elif char == 0x7D or char == 0x5D:  # } ]
+                self._end_literal()
+                self._containers.pop()
+                self.path.pop()
+                self._expect_key = False
+            elif char == 0x3A:  # :
+                self._expect_key = False
+            elif char == 0x2C:  # ,
+                self._end_literal()
+                if self._containers[-1] == 0x7B:
+                    self._expect_key = True
+                else:
+                    self.path[-1] += 1
+            else:
+                self._token.append(char)
+
+    def _string_char(self, char):
+        """
+        Handle a character inside a string.
+
+        Args:
+            char (int): Character to handle.
+
+        Returns:
+            None.
+        """
+        if self._digits:
+            # Hex digits of a \\u escape.
+            self._code = (self._code << 4) | int(chr(char), 16)
+            self._digits -= 1
+            if not self._digits:
+                self._add_code(self._code)
+            return
+        if self._escape:
+            self._escape = False
+            if char == 0x75:  # u
+                self._digits = 4
+                self._code = 0
+                return
+            char = ESCAPES.get(char, char)
+        elif char == 0x5C:  # \\
+            self._escape = True
+            return
+        elif char == 0x22:  # "
+            self._in_string = False
+            if self._high:
+                self._end_surrogate()
+            token = self._token
+            if not self._room:
+                token = _complete(token)
+            value = token.decode()
+            self._token = bytearray()
+            if self._expect_key:
+                self.path[-1] = value
+            else:
+                self.handler(self.path, value)
+            return
+
+        if self._high:
+            self._end_surrogate()
+        if self._room:
+            self._token.append(char)
+            self._room -= 1
+
+    def _add_code(self, code):
+        """
+        Add a character given by its code, joining surrogate pairs.
+
+        Args:
+            code (int): Code given by the escape.
+
+        Returns:
+            None.
+        """
+        if self._high:
+            if 0xDC00 <= code < 0xE000:
+                code = 0x10000 + ((self._high - 0xD800) << 10) + code - 0xDC00
+                self._high = 0
+            else:
+                self._end_surrogate()
+        if 0xD800 <= code < 0xDC00:
+            # Wait for the low surrogate in the next escape.
+            self._high = code
+        elif 0xDC00 <= code < 0xE000:
+            self._add(REPLACEMENT)
+        else:
+            self._add(chr(code).encode())
+
+    def _end_surrogate(self):
+        """
+        Replace a high surrogate which is not followed by a low one.
+
+        Returns:
+            None.
+        """
+        self._high = 0
+        self._add(REPLACEMENT)
+
+    def _add(self, data):
+        """
+        Add a whole character to the string, if there is room for it.
+
+        Args:
+            data (bytes): Character encoded in UTF-8.
+
+        Returns:
+            None.
+        """
+        if len(data) <= self._room:
+            self._token.extend(data)
+            self._room -= len(data)
+        else:
+            self._room = 0
+
+    def _end_literal(self):
+        """
+        Report the number, boolean or null being scanned, if any.
+
+        Returns:
+            None.
+        """
+        if not self._token:
+            return
+        text = self._token.decode()
+        self._token = bytearray()
+        if text in LITERALS:
+            value = LITERALS[text]
+        elif "." in text or "e" in text or "E" in text:
+            value = float(text)
+        else:
+            value = int(text)
+        self.handler(self.path, value)
@@ -0,0 +1,194 @@
+"""
+Brightness level of each pixel, applied on top of the board brightness.
+
+The levels are attached to a board, which then applies them together with
+its brightness and gamma table in the same pass over the changed pixels.
+Colors are kept as they are, so changing a level costs one pass and one
+write. Boards which never dim single pixels do not load this module.
+
+    >>> levels = levels_of(board)
+    >>> levels.set_pixel(0, 64)
+    >>> levels.set_zone(32, start=2, count=2)
+    >>> dim(board, 16)  # The whole board, same as `board.brightness = 16`.
+"""
+import sys
+
+if sys.implementation.name == "micropython":
+    import micropython
+
+    @micropython.viper
+    def _apply_levels(out, frame, lut, levels, start: int, end: int):
+        """
+        Translate `frame` into `out` and scale each pixel by its level.
+
+        Arguments as on the CPython version below.
+        """
+        dst = ptr8(out)  # noqa: F821
+        src = ptr8(frame)  # noqa: F821
+        table = ptr8(lut)  # noqa: F821
+        level = ptr8(levels)  # noqa: F821
+        pixel = start
+        index = start * 3
+        while pixel < end:
+            scale = level[pixel] + 1
+            dst[index] = (table[src[index]] * scale) >> 8
+            dst[index + 1] = (table[src[index + 1]] * scale) >> 8
+            dst[index + 2] = (table[src[index + 2]] * scale) >> 8
+            index += 3
+            pixel += 1
+
+else:
+
+    def _apply_levels(out, frame, lut, levels, start, end):
+        """
+        Translate `frame` into `out` and scale each pixel by its level.
+
+        Colors go through the `lut` table and are then scaled by the
+        brightness level of their pixel.
+
+        Args:
+            out (bytearray): Buffer where the result is written.
+            frame (bytearray): Buffer to be translated.
+            lut (bytearray): Table of 256 entries.
+            levels (bytearray): Brightness level of each pixel (0 - 255).
+            start (int): First pixel to translate.
+            end (int): Pixel after the last one to translate.
+
+        Returns:
+            None.
+        """
+        for pixel in range(start, end):
+            scale = levels[pixel] + 1
+            index = pixel * 3
+            out[index] = (lut[frame[index]] * scale) >> 8
+            out[index + 1] = (lut[frame[index + 1]] * scale) >> 8
+            out[index + 2] = (lut[frame[index + 2]] * scale) >> 8
+
+
+class Levels:
+    """
+    Brightness level of each pixel of a board.
+
+    Attributes:
+        board (StatusBoard): Board the levels are attached to.
+        values (bytearray): Level of each pixel (0 - 255).
+    """
+
+    def __init__(self, board):
+        """Attach levels at full brightness to a board."""
+        self.board = board
+        self.values = bytearray(b"\xff" * board.neopixels)
+        board.levels = self
+
+    def render(self, out, frame, lut, start, end):
+        """
+        Translate the changed pixels of a frame into the strip buffer.
+
+        Args:
+            out (bytearray): Buffer where the result is written.
+            frame (bytearray): Buffer to be translated.
+            lut (bytearray): Table of 256 entries.
+            start (int): First pixel to translate.
+            end (int): Pixel after the last one to translate.
+
+        Returns:
+            None.
+        """
+        _apply_levels(out, frame, lut, self.values, start, end)
+
+    def set_pixel(self, pixel, level):
+        """
+        Set the brightness level of a pixel.
+
+        Args:
+            pixel (int): Led position on the board.
+            level (int): Brightness level (0 - 255).
+
+        Returns:
+            None.
+        """
+        self.set_zone(level, self.board._pixel_index(pixel), 1)
+
+    def set_zone(self, level, start=0, count=None, step=1):
+        """
+        Set the brightness level of a range of pixels.
+
+        Args:
+            level (int): Brightness level (0 - 255).
+            start (int): First pixel.
+            count (int): Count of pixels, up to the end of the strip if not
+            given.
+            step (int): Distance between two pixels of the range.
+
+        Returns:
+            None.
+        """
+        if not 0 <= level <= 255:
+            raise ValueError("brightness level out of range")
+        board = self.board
+        if count is None:
+            count = (board.neopixels - start + step - 1) // step
+        end = start + (count - 1) * step + 1
+        with board._change:
+            values = self.values
+            try:
+                values[start:end:step] = bytes((level,)) * count
+            except NotImplementedError:
+                # MicroPython does not support slices with a step.
+                for pixel in range(start, end, step):
+                    values[pixel] = level
+            # The frame has not changed, so it is not compared with the last one.
+            board._synced = False
+            board._write(start, end)
+
+    def remove(self):
+        """
+        Detach the levels, the board is written without them from now on.
+
+        Returns:
+            None.
+        """
+        board = self.board
+        with board._change:
+            board.levels = None
+            board._synced = False
+            board._write()
+
+
+def levels_of(board):
+    """
+    Get the levels attached to a board, attaching them if needed.
+
+    Args:
+        board (StatusBoard): Board to be dimmed.
+
+    Returns:
+        Levels: Levels of the board.
+    """
+    if board.levels is None:
+        return Levels(board)
+    return board.levels
+
+
+def dim(board, level, pixels=()):
+    """
+    Set a brightness level on some pixels, or on the whole board.
+
+    Args:
+        board (StatusBoard): Board to be dimmed.
+        level (int): Brightness level (0 - 255).
+        pixels: Pixel numbers, a `range` sets them as a single zone. The
+        `brightness` of the board is set instead if there are none.
+
+    Returns:
+        None.
+    """
+    if not pixels:
+        board.brightness = level
+    elif isinstance(pixels, range):
+        levels_of(board).set_zone(level, pixels.start, len(pixels), pixels.step)
+    else:
+        levels = levels_of(board)
+        with board.batch():
+            for pixel in pixels:
+                levels.set_pixel(pixel, level)
@@ -0,0 +1,325 @@
+"""
+Cheap runtime counters and latency histograms.
+
+Counters are plain integers and histograms keep a fixed array of buckets,
+so recording a value does not allocate. Everything can be read as a
+dictionary or rendered as compact text for a `/metrics` endpoint.
+
+    >>> metrics = Metrics()
+    >>> metrics.watch_board(board)
+    >>> started = metrics.now()
+    >>> metrics.since("loop_us", started)
+    >>> print(metrics.render())
+"""
+import gc
+from array import array
+from time import ticks_diff
+from time import ticks_us
+
+
+class Histogram:
+    """
+    Histogram of durations in microseconds with power of two buckets.
+
+    The first bucket holds values up to `base`, each following bucket
+    doubles the limit of the previous one and the last bucket holds
+    everything above.
+
+    Attributes:
+        base (int): Upper limit of the first bucket.
+        counts (array): Count of values in each bucket.
+        count (int): Count of values added.
+        total (int): Sum of the values added.
+        max (int): Largest value added.
+    """
+
+    def __init__(self, buckets=14, base=16):
+        self.base = base
+        self.counts = array("L", [0] * buckets)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        """
+        Add a value to its bucket.
+
+        Args:
+            value (int): Duration in microseconds.
+
+        Returns:
+            None.
+        """
+        index = 0
+        limit = self.base
+        last = len(self.counts) - 1
+        while value > limit and index < last:
+            limit <<= 1
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def limit(self, index):
+        """
+        Get the upper limit of a bucket.
+
+        Args:
+            index (int): Bucket number.
+
+        Returns:
+            int: Limit in microseconds, None for the last bucket.
+        """
+        if index >= len(self.counts) - 1:
+            return None
+        return self.base << index
+
+    def percentile(self, fraction):
+        """
+        Get an upper bound of a percentile of the values.
+
+        Args:
+            fraction (float): Percentile as a fraction, e.g. `0.99`.
+
+        Returns:
+            int: Limit of the bucket where the percentile falls, the largest
+            value if it falls on the last bucket, None without values.
+        """
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                limit = self.limit(index)
+                return self.max if limit is None else min(limit, self.max)
+        return self.max
+
+    def reset(self):
+        """
+        Drop all the values.
+
+        Returns:
+            None.
+        """
+        for index in range(len(self.counts)):
+            self.counts[index] = 0
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+
+class Metrics:
+    """
+    Registry of counters, histograms and memory figures.
+
+    Automatic garbage collections are noticed when the allocated memory
+    drops between two samples, so `gc_collections` is a lower bound unless
+    collections go through `collect`.
+
+    Attributes:
+        counters (dict): Counters by name.
+        histograms (dict): Histograms by name.
+        gc_collections (int): Count of garbage collections seen.
+        mem_free_min (int): Lowest free heap seen, None off the board.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.gc_collections = 0
+        self.mem_free_min = None
+        self._mem_alloc = 0
+        self._watched = []
+
+    @staticmethod
+    def now():
+        """
+        Get the current time to be given later to `since`.
+
+        Returns:
+            int: `ticks_us` value.
+        """
+        return ticks_us()
+
+    def incr(self, name, value=1):
+        """
+        Increase a counter, creating it if needed.
+
+        Args:
+            name (str): Name of the counter.
+            value (int): Amount added.
+
+        Returns:
+            None.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def histogram(self, name):
+        """
+        Get a histogram, creating it if needed.
+
+        Args:
+            name (str): Name of the histogram.
+
+        Returns:
+            Histogram: Histogram registered with that name.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        return histogram
+
+    def observe(self, name, value):
+        """
+        Add a duration to a histogram.
+
+        Args:
+            name (str): Name of the histogram.
+            value (int): Duration in microseconds.
+
+        Returns:
+            None.
+        """
+        self.histogram(name).add(value)
+
+    def since(self, name, started):
+        """
+        Add the time elapsed since `started` to a histogram.
+
+        Args:
+            name (str): Name of the histogram.
+            started (int): Value returned by `now`.
+
+        Returns:
+            int: Microseconds elapsed.
+        """
+        elapsed = ticks_diff(ticks_us(), started)
+        self.histogram(name).add(elapsed)
+        return elapsed
+
+    def sample_memory(self):
+        """
+        Update the low water mark of the free heap and look for garbage
+        collections since the last sample.
+
+        Returns:
+            None.
+        """
+        mem_alloc = getattr(gc, "mem_alloc", None)
+        mem_free = getattr(gc, "mem_free", None)
+        if mem_alloc is None or mem_free is None:
+            return
+        allocated = mem_alloc()
+        if allocated < self._mem_alloc:
+            self.gc_collections += 1
+        self._mem_alloc = allocated
+        free = mem_free()
+        if self.mem_free_min is None or free < self.mem_free_min:
+            self.mem_free_min = free
+
+    def collect(self):
+        """
+        Run a garbage collection and count it.
+
+        Returns:
+            None.
+        """
+        self.sample_memory()
+        gc.collect()
+        self.gc_collections += 1
+        mem_alloc = getattr(gc, "mem_alloc", None)
+        if mem_alloc is not None:
+            self._mem_alloc = mem_alloc()
+
+    def watch(self, function):
+        """
+        Register a function returning a dictionary of values, read on
+        every snapshot, e.g. `board.stats`.
+
+        Args:
+            function: Function without arguments.
+
+        Returns:
+            None.
+        """
+        self._watched.append(function)
+
+    def watch_board(self, board, name="strip"):
+        """
+        Read the write counters of a board and time its strip writes.
+
+        Args:
+            board (StatusBoard): Board to be watched.
+            name (str): Prefix of the names of the board values.
+
+        Returns:
+            None.
+        """
+        board.write_hist = self.histogram(name + "_write_us")
+        self.watch(
+            lambda: {name + "_" + key: value for key, value in board.stats().items()}
+        )
+
+    def snapshot(self):
+        """
+        Get all the values.
+
+        Returns:
+            dict: Counters, watched values and memory figures by name, and
+            a dictionary with `count`, `sum`, `max`, `p50`, `p99` and
+            `buckets` for each histogram.
+        """
+        self.sample_memory()
+        values = dict(self.counters)
+        for function in self._watched:
+            values.update(function())
+        values["gc_collections"] = self.gc_collections
+        if self.mem_free_min is not None:
+            values["mem_free_min"] = self.mem_free_min
+            values["mem_free"] = gc.mem_free()
+        for name, histogram in self.histograms.items():
+            values[name] = {
+                "count": histogram.count,
+                "sum": histogram.total,
+                "max": histogram.max,
+                "p50": histogram.percentile(0.5),
+                "p99": histogram.percentile(0.99),
+                "buckets": list(histogram.counts),
+            }
+        return values
+
+    def render(self):
+        """
+        Render all the values as text, one `name value` line each.
+
+        Histograms get `_count`, `_sum` and `_max` lines plus cumulative
+        `_bucket{le="..."}` lines up to the bucket of the largest value.
+
+        Returns:
+            str: Text with all the values.
+        """
+        lines = []
+        for name, value in self.snapshot().items():
+            if not isinstance(value, dict):
+                lines.append("%s %d" % (name, value))
+                continue
+            lines.append("%s_count %d" % (name, value["count"]))
+            lines.append("%s_sum %d" % (name, value["sum"]))
+            lines.append("%s_max %d" % (name, value["max"]))
+            histogram = self.histograms[name]
+            seen = 0
+            for index, count in enumerate(histogram.counts):
+                seen += count
+                limit = histogram.limit(index)
+                if limit is None:
+                    break
+                lines.append('%s_bucket{le="%d"} %d' % (name, limit, seen))
+                if seen == histogram.count:
+                    break
+            lines.append('%s_bucket{le="+Inf"} %d' % (name, histogram.count))
+        lines.append("")
+        return "\n".join(lines)
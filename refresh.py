@@ -0,0 +1,180 @@
+"""
+Refresh loop writing the strip at a fixed rate, apart from the code
+changing the pixels.
+
+Once started, the board stops writing on each change and at the end of
+each batch: producers only change `board.buf`, the back buffer, and mark
+the pixels they touch. On each frame the changed part of the back buffer
+is rendered into `neostrip.buf`, the front buffer sent to the strip, with
+brightness and levels applied, and written once. A burst of changes between two frames
+costs a single write and a frame with no changes costs nothing.
+
+Frames are driven by a `machine.Timer`. Its callback runs in interrupt
+context, so it only schedules the frame with `micropython.schedule` and
+the frame itself runs on the main program, between two bytecodes, even
+while it waits on the network. A frame is put off while a batch of changes
+is in progress, and every change to the board runs as a batch of its own,
+so half done updates are never shown.
+
+    >>> refresher = Refresher(board, fps=30)
+    >>> refresher.start()
+    >>> board.set_pixel_color(0, "green")  # Shown on the next frame.
+
+Where timers are not available, `run` drives the frames from an asyncio
+task instead.
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from time import ticks_diff
+from time import ticks_ms
+
+import machine
+import micropython
+
+
+class Refresher:
+    """
+    Write the changes made on a board at a fixed rate.
+
+    Attributes:
+        board (StatusBoard): Board written.
+        period_ms (int): Milliseconds between frames.
+        timer_id (int): Timer driving the frames, -1 for a virtual one.
+        ticks (int): Count of timer ticks.
+        frames (int): Count of frames written to the strip.
+        deferred (int): Count of frames put off because a batch of changes
+        was in progress.
+        missed (int): Count of ticks dropped because the previous frame had
+        not run yet or, with `run`, frames which took longer than the
+        period.
+    """
+
+    def __init__(self, board, fps=30, timer_id=-1):
+        self.board = board
+        self.period_ms = 1000 // fps
+        self.timer_id = timer_id
+        self.ticks = 0
+        self.frames = 0
+        self.deferred = 0
+        self.missed = 0
+        self._timer = None
+        self._pending = False
+        # Bound methods are created once, creating them in an IRQ allocates.
+        self._tick_ref = self._tick
+        self._frame_ref = self._scheduled_frame
+
+    def start(self):
+        """
+        Start writing frames from the timer.
+
+        Returns:
+            None.
+        """
+        self.board.held = True
+        if self._timer is None:
+            self._timer = machine.Timer(self.timer_id)
+        self._timer.init(
+            mode=machine.Timer.PERIODIC,
+            period=self.period_ms,
+            callback=self._tick_ref,
+        )
+
+    def stop(self):
+        """
+        Stop the timer, write the pending changes and let the board write
+        its changes again.
+
+        Returns:
+            None.
+        """
+        if self._timer is not None:
+            self._timer.deinit()
+        self.board.held = False
+        self.refresh()
+
+    def _tick(self, timer):
+        """
+        Schedule a frame, called in interrupt context.
+
+        Args:
+            timer (machine.Timer): Timer driving the frames.
+
+        Returns:
+            None.
+        """
+        self.ticks += 1
+        if self._pending:
+            self.missed += 1
+            return
+        self._pending = True
+        try:
+            micropython.schedule(self._frame_ref, 0)
+        except RuntimeError:
+            # The schedule queue is full, the next tick retries.
+            self._pending = False
+            self.missed += 1
+
+    def _scheduled_frame(self, _):
+        """
+        Write a frame, called through `micropython.schedule`.
+
+        Returns:
+            None.
+        """
+        self._pending = False
+        self.refresh()
+
+    def refresh(self):
+        """
+        Write the changes made since the last frame, if any.
+
+        Returns:
+            bool: True if the strip was written.
+        """
+        board = self.board
+        if board._change.depth:
+            self.deferred += 1
+            return False
+        sent = board.writes_sent
+        board.show()
+        if board.writes_sent == sent:
+            return False
+        self.frames += 1
+        return True
+
+    def stats(self):
+        """
+        Get the frame counters, e.g. to be watched by `metrics.Metrics`.
+
+        Returns:
+            Dictionary with the `frames`, `frames_deferred` and
+            `frames_missed` counters.
+        """
+        return {
+            "frames": self.frames,
+            "frames_deferred": self.deferred,
+            "frames_missed": self.missed,
+        }
+
+    async def run(self):
+        """
+        Write frames from an asyncio task instead of from the timer.
+
+        Returns:
+            None.
+        """
+        self.board.held = True
+        try:
+            while True:
+                started = ticks_ms()
+                self.refresh()
+                elapsed = ticks_diff(ticks_ms(), started)
+                if elapsed >= self.period_ms:
+                    self.missed += 1
+                    elapsed = self.period_ms
+                await asyncio.sleep((self.period_ms - elapsed) / 1000)
+        finally:
+            self.board.held = False
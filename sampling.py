@@ -0,0 +1,170 @@
+"""
+Sampling pipeline for noisy sensors.
+
+Readings go into a preallocated ring buffer, are smoothed with a moving
+average or median and then classified into levels with some hysteresis, so
+a value wandering around a threshold does not flip the LEDs back and forth.
+
+    >>> temperature = RingBuffer(5)
+    >>> levels = Hysteresis((16, 25), band=0.5)
+    >>> temperature.append(24.8)
+    >>> levels.update(temperature.median())
+    1
+"""
+from array import array
+
+try:
+    import machine
+except ImportError:
+    machine = None
+
+
+class RingBuffer:
+    """
+    Fixed size buffer keeping the last values appended.
+
+    All memory is allocated when the buffer is created, so appending and
+    filtering values does not allocate.
+
+    Attributes:
+        size (int): Count of values kept.
+        values (array): Values stored, in no particular order.
+    """
+
+    def __init__(self, size, typecode="f"):
+        self.size = size
+        self.values = array(typecode, [0] * size)
+        self._sorted = array(typecode, [0] * size)
+        self._count = 0
+        self._index = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        """
+        Add a value replacing the oldest one once the buffer is full.
+
+        Args:
+            value: Value to be added.
+
+        Returns:
+            None.
+        """
+        self.values[self._index] = value
+        self._index = (self._index + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+
+    def clear(self):
+        """
+        Drop all the values.
+
+        Returns:
+            None.
+        """
+        self._count = 0
+        self._index = 0
+
+    def mean(self):
+        """
+        Get the moving average of the values.
+
+        Returns:
+            Average value, None if the buffer is empty.
+        """
+        if not self._count:
+            return None
+        total = 0
+        for index in range(self._count):
+            total += self.values[index]
+        return total / self._count
+
+    def median(self):
+        """
+        Get the moving median of the values, which ignores single spikes.
+
+        Returns:
+            Median value, None if the buffer is empty.
+        """
+        count = self._count
+        if not count:
+            return None
+
+        # Insertion sort into the preallocated array.
+        ordered = self._sorted
+        for index in range(count):
+            value = self.values[index]
+            position = index
+            while position and ordered[position - 1] > value:
+                ordered[position] = ordered[position - 1]
+                position -= 1
+            ordered[position] = value
+
+        middle = count // 2
+        if count % 2:
+            return ordered[middle]
+        return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class Hysteresis:
+    """
+    Classify values into levels split by thresholds.
+
+    The level only moves up once the value is `band` above a threshold and
+    only moves down once it is `band` below it.
+
+    Attributes:
+        thresholds (tuple): Thresholds in ascending order.
+        band (float): Margin around each threshold.
+        level (int): Current level, from 0 (below all thresholds) to the
+        count of thresholds (above all of them).
+    """
+
+    def __init__(self, thresholds, band=0.5):
+        self.thresholds = tuple(sorted(thresholds))
+        self.band = band
+        self.level = None
+
+    def update(self, value):
+        """
+        Classify a new value.
+
+        Args:
+            value: Value to be classified.
+
+        Returns:
+            int: Level of the value.
+        """
+        thresholds = self.thresholds
+        level = self.level
+        if level is None:
+            level = 0
+            while level < len(thresholds) and value >= thresholds[level]:
+                level += 1
+        else:
+            band = self.band
+            while level < len(thresholds) and value >= thresholds[level] + band:
+                level += 1
+            while level > 0 and value < thresholds[level - 1] - band:
+                level -= 1
+        self.level = level
+        return level
+
+
+def idle(milliseconds):
+    """
+    Wait in a low power state, if the board supports it.
+
+    The CPU is stopped so no other task runs meanwhile, it is meant for
+    scripts doing nothing but sampling. It does nothing off the board.
+
+    Args:
+        milliseconds (int): Time to wait.
+
+    Returns:
+        None.
+    """
+    lightsleep = getattr(machine, "lightsleep", None)
+    if lightsleep is not None:
+        lightsleep(milliseconds)
@@ -0,0 +1,514 @@
+"""
+Scheduler running status sources and showing their result on the board.
+
+Each source is polled on its own task with its own interval and timeout,
+so a slow or failing source never delays the others. A failing source is
+retried with an exponential backoff plus some random jitter.
+
+    >>> scheduler = Scheduler(board)
+    >>> scheduler.add(JenkinsSource(jenkins, {0: "job/project1"}, interval=10))
+    >>> scheduler.add(HTTPCheckSource("192.168.1.10", pixels=[3], interval=30))
+    >>> scheduler.add(CallableSource(check, pixels=zones["alerts"], interval=5))
+    >>> scheduler.add(DimmerSource([(7, 0, 255), (22, 30, 24)]))
+    >>> uasyncio.run(scheduler.run())
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    import urandom as random
+except ImportError:
+    import random
+
+import time
+
+from sampling import Hysteresis
+from sampling import RingBuffer
+
+
+def _drop(chunk):
+    """Drop a chunk of a response body."""
+
+
+def _no_body():
+    """Get a sink for response bodies which are not needed, only the status is."""
+    return _drop
+
+
+class Source:
+    """
+    Base class for the status sources.
+
+    Subclasses implement `read` which returns the color for the pixels of
+    the source, a single color for all of them or a list with one color per
+    pixel. Colors are names of the board colors or (R, G, B) tuples. An
+    integer is a brightness level for the pixels instead.
+
+    The pixels can be given as a `segments.Segment`, then a single color is
+    shown with one fill of the whole segment.
+
+    Attributes:
+        pixels: Pixels where the status is shown.
+        zone (segments.Segment): Segment given as pixels, if any.
+        interval (int): Seconds between reads.
+        timeout (int): Seconds to wait for a read.
+        max_backoff (int): Longest wait in seconds after failed reads.
+        error_color: Color shown after a failed read, None to keep the last
+        status shown.
+        name (str): Name of the source on the metrics, the scheduler gives
+        one based on the class if not set.
+        failures (int): Count of consecutive failed reads.
+        reads (int): Count of successful reads.
+        last_result: Last status shown, it is not shown again until it
+        changes.
+    """
+
+    def __init__(
+        self,
+        pixels,
+        interval=10,
+        timeout=5,
+        max_backoff=300,
+        error_color=None,
+        name=None,
+    ):
+        if hasattr(pixels, "fill"):
+            self.zone = pixels
+            self.pixels = pixels.pixels
+        else:
+            self.zone = None
+            self.pixels = list(pixels)
+        self.interval = interval
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.error_color = error_color
+        self.name = name
+        self.failures = 0
+        self.reads = 0
+        self.last_result = None
+
+    async def read(self):
+        """
+        Read the current status.
+
+        Returns:
+            A color or a list of colors, one for each pixel.
+        """
+        raise NotImplementedError
+
+    def next_delay(self):
+        """
+        Get the seconds to wait before the next read.
+
+        After a failure the interval is doubled for each consecutive
+        failure, up to `max_backoff`, and spread by up to 25% either way.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        if not self.failures:
+            return self.interval
+        delay = min(self.interval * 2 ** self.failures, self.max_backoff)
+        jitter = random.getrandbits(8) - 128
+        return delay + delay * jitter / 512
+
+
+class CallableSource(Source):
+    """
+    Source calling a function, or awaiting a coroutine function, to get
+    the status.
+
+    A plain function runs on the event loop so it should return quickly.
+
+    Attributes:
+        function: Function returning a color or a list of colors.
+    """
+
+    def __init__(self, function, pixels, **kwargs):
+        super().__init__(pixels, **kwargs)
+        self.function = function
+
+    async def read(self):
+        """
+        Call the function.
+
+        Returns:
+            A color or a list of colors, one for each pixel.
+        """
+        result = self.function()
+        if hasattr(result, "send"):
+            result = await result
+        return result
+
+
+class JenkinsSource(Source):
+    """
+    Source showing the build status of Jenkins jobs.
+
+    A timeout ends the whole poll, the jobs already read included, so it
+    has to cover every request of it. Unless one is given, it is the
+    `timeout` of the client for each round of requests, one request on each
+    connection, plus a second so the timeout of a single request fires
+    first.
+
+    Attributes:
+        jenkins (jenkins.Jenkins): Client used to poll the jobs.
+        jobs (dict): Job path by pixel number, or job name if a folder is
+        given.
+        folder (str): Folder or view holding all the jobs, read with a
+        single request.
+    """
+
+    def __init__(self, jenkins, jobs, folder=None, **kwargs):
+        if "timeout" not in kwargs:
+            rounds = 1
+            if folder is None:
+                rounds = -(-len(jobs) // jenkins.max_connections)
+            kwargs["timeout"] = rounds * jenkins.timeout + 1
+        super().__init__(jobs.keys(), **kwargs)
+        self.jenkins = jenkins
+        self.jobs = jobs
+        self.folder = folder
+
+    async def read(self):
+        """
+        Poll the jobs.
+
+        Returns:
+            list: Color for each job.
+        """
+        if self.folder is None:
+            results = await self.jenkins.poll(set(self.jobs.values()))
+        else:
+            results = await self.jenkins.get_folder_status(self.folder)
+
+        statuses = [results.get(self.jobs[pixel]) for pixel in self.pixels]
+        if all(status is None for status in statuses):
+            raise ValueError("no status for any job")
+        return [self.jenkins.get_status_color(status) for status in statuses]
+
+
+class HTTPCheckSource(Source):
+    """
+    Source checking a web server answers with a `200` status.
+
+    Attributes:
+        path (str): Path requested.
+        ok_color: Color shown when the server is healthy.
+        fail_color: Color shown when the server answers with an error.
+    """
+
+    def __init__(
+        self,
+        host,
+        port=80,
+        path="/",
+        pixels=(0,),
+        ok_color="green",
+        fail_color="red",
+        **kwargs
+    ):
+        kwargs.setdefault("error_color", fail_color)
+        super().__init__(pixels, **kwargs)
+        self.path = path
+        self.ok_color = ok_color
+        self.fail_color = fail_color
+        # Imported here so schedulers without HTTP checks do not load the
+        # Jenkins client and the JSON scanner.
+        from jenkins import HTTPConnection
+
+        self._connection = HTTPConnection(host, port)
+
+    async def read(self):
+        """
+        Request the path.
+
+        Returns:
+            Color for the status of the server.
+        """
+        try:
+            status, _ = await self._connection.request(self.path, new_sink=_no_body)
+        except BaseException:
+            # Cancelled by a timeout too, the rest of the response would be
+            # read as the answer to the next request.
+            self._connection.close()
+            raise
+        return self.ok_color if status == 200 else self.fail_color
+
+
+class DHTSource(Source):
+    """
+    Source showing whether temperature and humidity are within limits.
+
+    The first pixel shows the temperature, `red` if too hot, `blue` if too
+    cold and `green` otherwise. The second one shows the humidity, `green`
+    within the limits and `red` otherwise.
+
+    Readings are smoothed with a moving median over the last `window`
+    samples and a limit is only considered crossed once the value goes
+    `band` beyond it, so noise around a limit does not flip the LEDs.
+
+    Attributes:
+        sensor: `dht.DHT11` or `dht.DHT22` instance.
+        min_temp (int): Minimum temperature accepted.
+        max_temp (int): Maximum temperature accepted.
+        min_hum (int): Minimum humidity accepted.
+        max_hum (int): Maximum humidity accepted.
+        temperature (sampling.RingBuffer): Last temperature readings.
+        humidity (sampling.RingBuffer): Last humidity readings.
+    """
+
+    temperature_colors = ("blue", "green", "red")
+    humidity_colors = ("red", "green", "red")
+
+    def __init__(
+        self,
+        sensor,
+        pixels=(0, 2),
+        min_temp=16,
+        max_temp=25,
+        min_hum=30,
+        max_hum=50,
+        window=5,
+        band=0.5,
+        **kwargs
+    ):
+        super().__init__(pixels, **kwargs)
+        self.sensor = sensor
+        self.min_temp = min_temp
+        self.max_temp = max_temp
+        self.min_hum = min_hum
+        self.max_hum = max_hum
+        self.temperature = RingBuffer(window)
+        self.humidity = RingBuffer(window)
+        self._temperature_levels = Hysteresis((min_temp, max_temp), band)
+        self._humidity_levels = Hysteresis((min_hum, max_hum), band)
+
+    async def read(self):
+        """
+        Measure temperature and humidity.
+
+        Returns:
+            list: Color for the temperature and for the humidity.
+        """
+        self.sensor.measure()
+        self.temperature.append(self.sensor.temperature())
+        self.humidity.append(self.sensor.humidity())
+
+        temperature = self._temperature_levels.update(self.temperature.median())
+        humidity = self._humidity_levels.update(self.humidity.median())
+        return [self.temperature_colors[temperature], self.humidity_colors[humidity]]
+
+
+class DimmerSource(Source):
+    """
+    Source changing the brightness along the day, e.g. to dim the strip at
+    night.
+
+    Without pixels the brightness of the whole board changes, otherwise
+    only the level of the pixels given. Either way the colors are kept and
+    the strip is written once for each change.
+
+    The time is taken from `time.localtime`, so the clock of the board
+    must be set, e.g. with `ntptime.settime()`.
+
+    Attributes:
+        schedule (list): Tuples of (hour, minute, level) with the brightness
+        level from that time on, sorted by time.
+    """
+
+    def __init__(self, schedule, pixels=(), interval=60, **kwargs):
+        super().__init__(pixels, interval=interval, **kwargs)
+        self.schedule = sorted(schedule)
+
+    def level_at(self, hour, minute):
+        """
+        Get the brightness level for a time of the day.
+
+        Args:
+            hour (int): Hour of the day.
+            minute (int): Minute of the hour.
+
+        Returns:
+            int: Level of the last entry before the time, the last entry of
+            the day if none.
+        """
+        level = self.schedule[-1][2]
+        for entry_hour, entry_minute, entry_level in self.schedule:
+            if (entry_hour, entry_minute) > (hour, minute):
+                break
+            level = entry_level
+        return level
+
+    async def read(self):
+        """
+        Get the brightness level for the current time.
+
+        Returns:
+            int: Brightness level (0 - 255).
+        """
+        now = time.localtime()
+        return self.level_at(now[3], now[4])
+
+
+class Scheduler:
+    """
+    Run the sources and show their status on the board.
+
+    Attributes:
+        board (StatusBoard): Board where the status is shown.
+        sources (list): Sources registered.
+        metrics (metrics.Metrics): Registry getting the latency of each read
+        and the count of reads and failures by source, None to not record
+        them.
+    """
+
+    def __init__(self, board, metrics=None):
+        self.board = board
+        self.metrics = metrics
+        self.sources = []
+        self._tasks = []
+
+    def add(self, source):
+        """
+        Register a source, it starts with the scheduler or right away if
+        the scheduler is already running.
+
+        Args:
+            source (Source): Source to be registered.
+
+        Returns:
+            The source given.
+        """
+        if source.name is None:
+            source.name = "%s%d" % (
+                type(source).__name__.replace("Source", "").lower(),
+                len(self.sources),
+            )
+        self.sources.append(source)
+        if self._tasks:
+            self._tasks.append(asyncio.create_task(self._run_source(source)))
+        return source
+
+    def show(self, source, result):
+        """
+        Show the result of a source on its pixels with a single write.
+
+        Args:
+            source (Source): Source the result comes from.
+            result: A color, a list of colors, one for each pixel, or a
+            brightness level.
+
+        Returns:
+            None.
+        """
+        if isinstance(result, int):
+            # Imported here so boards which never dim pixels do not load it.
+            from levels import dim
+
+            dim(self.board, result, source.pixels)
+            return
+        if not isinstance(result, list):
+            if source.zone is not None:
+                source.zone.fill(result)
+                return
+            result = [result] * len(source.pixels)
+        with self.board.batch():
+            for pixel, color in zip(source.pixels, result):
+                if isinstance(color, str):
+                    self.board.set_pixel_color(pixel, color)
+                else:
+                    self.board.set_pixel_raw_color(pixel, color)
+
+    async def poll(self, source):
+        """
+        Read a source once and show the result.
+
+        Args:
+            source (Source): Source to be read.
+
+        Returns:
+            bool: True if the read succeeded.
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            started = metrics.now()
+        try:
+            result = await asyncio.wait_for(source.read(), source.timeout)
+            if result != source.last_result:
+                # A result the board can not show, e.g. an unknown color
+                # name, fails the read too instead of ending the task.
+                self.show(source, result)
+                source.last_result = result
+        except Exception as error:
+            if metrics is not None:
+                metrics.since("poll_us_" + source.name, started)
+                metrics.incr("poll_failures_" + source.name)
+            source.failures += 1
+            print("Error reading %s: %r" % (type(source).__name__, error))
+            if source.error_color is not None:
+                try:
+                    self.show(source, source.error_color)
+                except Exception as error:
+                    print("Error showing %s: %r" % (type(source).__name__, error))
+                source.last_result = None
+            return False
+
+        if metrics is not None:
+            metrics.since("poll_us_" + source.name, started)
+            metrics.incr("poll_reads_" + source.name)
+            metrics.sample_memory()
+        source.failures = 0
+        source.reads += 1
+        return True
+
+    async def _run_source(self, source):
+        """
+        Read a source forever.
+
+        Args:
+            source (Source): Source to be read.
+
+        Returns:
+            None.
+        """
+        while True:
+            await self.poll(source)
+            await asyncio.sleep(source.next_delay())
+
+    def start(self):
+        """
+        Create a task for each source on the running event loop.
+
+        Returns:
+            None.
+        """
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._run_source(source))
+                for source in self.sources
+            ]
+
+    def stop(self):
+        """
+        Cancel the tasks of all the sources.
+
+        Returns:
+            None.
+        """
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def run(self):
+        """
+        Start the sources and keep running.
+
+        Returns:
+            None.
+        """
+        self.start()
+        while True:
+            await asyncio.sleep(3600)
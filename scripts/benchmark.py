@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Script to benchmark the `StatusBoard` methods on the host.
+
+It uses the stand-ins on the `host` package in place of the MicroPython
+modules and, for each method and strip length, reports:
+
+- calls per second on CPython (useful to compare changes, not the speed on
+  the board),
+- strip writes, bytes sent and time on the wire per call,
+- peak memory allocated by a single call, the largest one, and memory
+  retained per call (tracemalloc).
+
+The source module and the minified one on the `release` folder are
+measured side by side, methods missing on one of them are skipped.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import host  # noqa: E402
+
+host.install()
+
+import effects  # noqa: E402
+import urandom  # noqa: E402
+
+DEFAULT_MODULES = ['status_board.py', 'release/status_board.py']
+DEFAULT_SIZES = [4, 16, 64, 256, 1000]
+
+
+def _batch_all_pixels(board, index: int):
+    with board.batch():
+        for pixel in range(board.neopixels):
+            board.set_pixel_raw_color(pixel, (index & 0xFF, pixel & 0xFF, 0))
+
+
+def _set_frame(board, index: int):
+    board.set_frame(board.benchmark_frames[index & 1])
+
+
+def _effect(name: str) -> Callable:
+    """Build a case showing a frame of one of the `effects` generators."""
+
+    def case(board, index: int):
+        generators = board.__dict__.setdefault('benchmark_effects', {})
+        if name not in generators:
+            generators[name] = getattr(effects, name)(board, seed=1)
+        generators[name].show()
+
+    return case
+
+
+# Each case is called with the board and the number of the call, colors
+# change on every call so no write can be skipped as a repeated frame.
+CASES: Dict[str, Tuple[str, Callable]] = {
+    'set_pixel_color': ('set_pixel_color', lambda board, index: board.set_pixel_color(
+        index % board.neopixels, 'red' if index // board.neopixels & 1 else 'blue')),
+    'set_pixel_raw_color': ('set_pixel_raw_color', lambda board, index: board.set_pixel_raw_color(
+        index % board.neopixels, (index & 0xFF, 0, 1))),
+    'set_pixel_random_color': ('set_pixel_random_color', lambda board, index: board.set_pixel_random_color(
+        index % board.neopixels)),
+    'color_all': ('color_all', lambda board, index: board.color_all('red' if index & 1 else 'blue')),
+    'clear_all': ('clear_all', lambda board, index: (board.color_all('red'), board.clear_all())),
+    'fill': ('fill', lambda board, index: board.fill((index & 0xFF, 0, 1))),
+    'set_frame': ('set_frame', _set_frame),
+    'batch_all_pixels': ('batch', _batch_all_pixels),
+    'effect_random_fill': ('set_frame', _effect('RandomFill')),
+    'effect_rainbow': ('set_frame', _effect('Rainbow')),
+    'effect_twinkle': ('set_frame', _effect('Twinkle')),
+    'effect_comet': ('set_frame', _effect('Comet')),
+}
+
+
+def load_module(path: str, name: str):
+    """Import a python file under a given module name.
+
+    Args:
+        path: Path of the file.
+        name: Name for the module.
+
+    Returns:
+        Module imported.
+    """
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(board, case: Callable, min_time: float, max_calls: int) -> Dict[str, float]:
+    """Call a case repeatedly and measure it.
+
+    Args:
+        board: `StatusBoard` instance.
+        case: Function called with the board and the number of the call.
+        min_time: Seconds to keep calling the case.
+        max_calls: Maximum count of calls.
+
+    Returns:
+        Measurements per call.
+    """
+    strip = board.neostrip
+    strip.reset_stats()
+    calls = 0
+    started = time.perf_counter()
+    elapsed = 0.0
+
+    while calls < max_calls and elapsed < min_time:
+        case(board, calls)
+        calls += 1
+        elapsed = time.perf_counter() - started
+
+    writes = strip.write_count
+    bytes_written = strip.bytes_written
+    wire_time_us = strip.wire_time_us
+
+    traced_calls = min(calls, 20)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    peak = 0
+    for index in range(traced_calls):
+        # The peak is not cumulative, it is measured on each call on its own.
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        case(board, calls + index)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - current)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        'calls_per_s': calls / elapsed,
+        'writes': writes / calls,
+        'bytes': bytes_written / calls,
+        'wire_ms': wire_time_us / calls / 1000,
+        'peak': peak,
+        'retained': (after - before) / traced_calls,
+    }
+
+
+def run(module_paths: List[str], sizes: List[int], cases: List[str], min_time: float,
+        max_calls: int) -> List[Tuple[str, int, str, Dict[str, float]]]:
+    """Run every case for every module and strip length.
+
+    Args:
+        module_paths: Files with the `StatusBoard` class.
+        sizes: Strip lengths.
+        cases: Names of the cases to run.
+        min_time: Seconds to run each case.
+        max_calls: Maximum count of calls for each case.
+
+    Returns:
+        Module, strip length, case and measurements of each run.
+    """
+    results = []
+
+    for index, path in enumerate(module_paths):
+        module = load_module(os.path.join(ROOT_DIR, path), f'benchmark_board_{index}')
+
+        for size in sizes:
+            urandom.seed(size)
+            board = module.StatusBoard(neopixels=size)
+            board.benchmark_frames = [bytes([value]) * (size * 3) for value in (1, 2)]
+
+            for name in cases:
+                method, case = CASES[name]
+                if not hasattr(board, method):
+                    continue
+                results.append((path, size, name, measure(board, case, min_time, max_calls)))
+
+    return results
+
+
+def print_report(results: List[Tuple[str, int, str, Dict[str, float]]]):
+    """Print the measurements as a table.
+
+    Args:
+        results: Module, strip length, case and measurements of each run.
+
+    Returns:
+        None.
+    """
+    header = (f"{'module':<24} {'leds':>5} {'method':<24} {'calls/s':>10} {'writes':>7} "
+              f"{'bytes':>8} {'wire ms':>8} {'peak B':>8} {'kept B':>7}")
+    print(header)
+    print('-' * len(header))
+
+    for path, size, name, values in results:
+        print(f"{path:<24} {size:>5} {name:<24} {values['calls_per_s']:>10.0f} {values['writes']:>7.2f} "
+              f"{values['bytes']:>8.0f} {values['wire_ms']:>8.2f} {values['peak']:>8.0f} "
+              f"{values['retained']:>7.0f}")
+
+
+def main(options):
+    """Run the benchmark with the given options.
+
+    Args:
+        options: `parser.parse_args()` arguments.
+
+    Returns:
+        None.
+    """
+    sizes = [int(size) for size in options.sizes.split(',')]
+    cases = options.methods.split(',') if options.methods else list(CASES)
+
+    for name in cases:
+        if name not in CASES:
+            print(f"Unknown method '{name}', available: {', '.join(CASES)}")
+            exit(-1)
+
+    print_report(run(options.modules, sizes, cases, options.time, options.calls))
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Benchmark the StatusBoard methods on the host.')
+
+    parser.add_argument('-m', '--modules', action='store', nargs='+', default=DEFAULT_MODULES,
+                        help='Files with the StatusBoard class, relative to the repository.')
+    parser.add_argument('-s', '--sizes', action='store', default=','.join(map(str, DEFAULT_SIZES)),
+                        type=str, help='Comma separated strip lengths.')
+    parser.add_argument('--methods', action='store', default='', type=str,
+                        help='Comma separated methods to run, all of them by default.')
+    parser.add_argument('-t', '--time', action='store', default=0.2, type=float,
+                        help='Seconds to run each method.')
+    parser.add_argument('-c', '--calls', action='store', default=2000, type=int,
+                        help='Maximum calls of each method.')
+
+    main(parser.parse_args())
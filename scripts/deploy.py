@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Script to upload files onto the board over a single raw REPL session.
+
+The board is asked for the sha256 of the files already on it and only the
+files whose content differs are sent, in large chunks and using the raw
+paste mode of MicroPython (with flow control) when the board supports it.
+
+It uses pyserial when it is installed, otherwise the serial port is opened
+directly, which only works on POSIX systems.
+
+To try it without a board, run the fake REPL of the `host` package and
+deploy to the pty it prints:
+
+    python3 -m host.repl --root /tmp/board
+    python3 scripts/deploy.py -p /dev/pts/5 status_board.py
+"""
+
+import argparse
+import hashlib
+import os
+import select
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import serial
+except ImportError:
+    serial = None
+
+PY_EXTENSION = '.py'
+RAW_PROMPT = b'raw REPL; CTRL-B to exit\r\n>'
+
+# Prints the sha256 of each file, or `-` if it does not exist.
+HASH_SCRIPT = '''
+try:
+    import uhashlib as hashlib, ubinascii as binascii
+except ImportError:
+    import hashlib, binascii
+def _hash(name):
+    try:
+        f = open(name, 'rb')
+    except OSError:
+        return '-'
+    digest = hashlib.sha256()
+    buf = bytearray(256)
+    view = memoryview(buf)
+    while True:
+        size = f.readinto(buf)
+        if not size:
+            break
+        digest.update(view[:size])
+    f.close()
+    return binascii.hexlify(digest.digest()).decode()
+for _name in %r:
+    print(_hash(_name))
+'''
+
+
+class REPLError(Exception):
+    """The board did not answer as expected or the code raised an error."""
+
+
+class PosixPort:
+    """
+    Serial port opened with `termios`, also works with a pseudo terminal.
+
+    Attributes:
+        fd (int): File descriptor of the port.
+    """
+
+    def __init__(self, path: str, baudrate: int):
+        import termios
+        import tty
+
+        self.fd = os.open(path, os.O_RDWR | os.O_NOCTTY)
+        tty.setraw(self.fd)
+        attributes = termios.tcgetattr(self.fd)
+        speed = getattr(termios, f'B{baudrate}')
+        attributes[4] = attributes[5] = speed
+        termios.tcsetattr(self.fd, termios.TCSANOW, attributes)
+
+    def write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
+
+    def read(self, size: int, timeout: float) -> bytes:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        return os.read(self.fd, size) if ready else b''
+
+    def waiting(self) -> bool:
+        return bool(select.select([self.fd], [], [], 0)[0])
+
+    def close(self):
+        os.close(self.fd)
+
+
+class SerialPort:
+    """
+    Serial port opened with pyserial.
+    """
+
+    def __init__(self, path: str, baudrate: int):
+        self.port = serial.Serial(path, baudrate, timeout=0)
+
+    def write(self, data: bytes):
+        self.port.write(data)
+
+    def read(self, size: int, timeout: float) -> bytes:
+        self.port.timeout = timeout
+        data = self.port.read(1)
+        if data and self.port.in_waiting:
+            data += self.port.read(min(size - 1, self.port.in_waiting))
+        return data
+
+    def waiting(self) -> bool:
+        return self.port.in_waiting > 0
+
+    def close(self):
+        self.port.close()
+
+
+class RawREPL:
+    """
+    Session on the raw REPL of a MicroPython board.
+
+    Attributes:
+        port: `PosixPort` or `SerialPort` connected to the board.
+        timeout: Seconds to wait for an answer.
+        raw_paste: Whether the board supports the raw paste mode, None until
+            the first command is sent.
+        bytes_sent: Count of bytes written to the port.
+        bytes_received: Count of bytes read from the port.
+    """
+
+    def __init__(self, port, timeout: float = 10):
+        self.port = port
+        self.timeout = timeout
+        self.raw_paste: Optional[bool] = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self._buffer = bytearray()
+
+    def write(self, data: bytes):
+        self.port.write(data)
+        self.bytes_sent += len(data)
+
+    def _receive(self, deadline: float):
+        """
+        Wait for data from the board and keep it on the buffer.
+
+        Args:
+            deadline: `time.monotonic` value to give up at.
+
+        Returns:
+            None.
+        """
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise REPLError(f'timeout waiting for the board, got {bytes(self._buffer[-64:])!r}')
+        chunk = self.port.read(1024, remaining)
+        self.bytes_received += len(chunk)
+        self._buffer += chunk
+
+    def read_until(self, ending: bytes) -> bytes:
+        """
+        Read from the board until an ending is received.
+
+        Args:
+            ending: Bytes ending the answer.
+
+        Returns:
+            Answer received, ending included.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            index = self._buffer.find(ending)
+            if index >= 0:
+                return self.read_until_size(index + len(ending))
+            self._receive(deadline)
+
+    def read_until_size(self, size: int) -> bytes:
+        """
+        Read an exact count of bytes.
+
+        Args:
+            size: Count of bytes.
+
+        Returns:
+            Bytes read.
+        """
+        deadline = time.monotonic() + self.timeout
+        while len(self._buffer) < size:
+            self._receive(deadline)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def enter(self):
+        """
+        Interrupt the running program and enter the raw REPL.
+
+        Returns:
+            None.
+        """
+        self.write(b'\r\x03\x03')
+        while self.port.read(1024, 0.2):
+            pass
+        self._buffer = bytearray()
+        self.write(b'\r\x01')
+        self.read_until(RAW_PROMPT)
+
+    def exit(self):
+        """
+        Go back to the friendly REPL.
+
+        Returns:
+            None.
+        """
+        self.write(b'\x02')
+
+    def _paste(self, code: bytes) -> bool:
+        """
+        Send code in raw paste mode, following the flow control of the board.
+
+        Args:
+            code: Code to be run.
+
+        Returns:
+            False if the board does not support the raw paste mode.
+        """
+        self.write(b'\x05A\x01')
+        answer = self.read_until_size(2)
+        if answer != b'R\x01':
+            if answer != b'R\x00':
+                # Older boards do not know the command and print the raw
+                # REPL prompt again, the bytes read are the start of it.
+                self._buffer[:0] = answer
+                self.read_until(RAW_PROMPT)
+            return False
+
+        window = struct.unpack('<H', self.read_until_size(2))[0]
+        remaining = window
+        sent = 0
+        while sent < len(code):
+            while remaining == 0 or self._buffer or self.port.waiting():
+                flag = self.read_until_size(1)
+                if flag == b'\x01':
+                    remaining += window
+                elif flag == b'\x04':
+                    self.write(b'\x04')
+                    raise REPLError('the board aborted the paste')
+                else:
+                    raise REPLError(f'unexpected flow control {flag!r}')
+            chunk = code[sent:sent + remaining]
+            self.write(chunk)
+            remaining -= len(chunk)
+            sent += len(chunk)
+        self.write(b'\x04')
+        self.read_until(b'\x04')
+        return True
+
+    def exec(self, code: str) -> bytes:
+        """
+        Run code on the board.
+
+        Args:
+            code: Code to be run.
+
+        Returns:
+            Output printed by the code.
+        """
+        code_bytes = code.encode()
+        if self.raw_paste is not False:
+            self.raw_paste = self._paste(code_bytes)
+        if not self.raw_paste:
+            # Without flow control, send small pieces to not overflow the
+            # UART buffer of the board.
+            for index in range(0, len(code_bytes), 256):
+                self.write(code_bytes[index:index + 256])
+                time.sleep(0.01)
+            self.write(b'\x04')
+            self.read_until(b'OK')
+
+        output = self.read_until(b'\x04')[:-1]
+        error = self.read_until(b'\x04')[:-1]
+        self.read_until(b'>')
+        if error:
+            raise REPLError(error.decode(errors='replace'))
+        return output
+
+
+def file_hash(path: str) -> str:
+    """
+    Get the sha256 of a local file.
+
+    Args:
+        path: Path of the file.
+
+    Returns:
+        Hexadecimal digest.
+    """
+    with open(path, 'rb') as local_file:
+        return hashlib.sha256(local_file.read()).hexdigest()
+
+
+def remote_hashes(repl: RawREPL, names: List[str]) -> Dict[str, str]:
+    """
+    Get the sha256 of files on the board with a single command.
+
+    Args:
+        repl: Session on the board.
+        names: Names of the files on the board.
+
+    Returns:
+        Digest by name, `-` for missing files.
+    """
+    output = repl.exec(HASH_SCRIPT % (names,)).decode().split()
+    return dict(zip(names, output))
+
+
+def upload(repl: RawREPL, files: List[Tuple[str, str]], chunk_size: int):
+    """
+    Write files on the board, packing as many chunks as fit in `chunk_size`
+    bytes on each command.
+
+    Args:
+        repl: Session on the board.
+        files: Local path and name on the board of each file.
+        chunk_size: Largest amount of file data sent on a command.
+
+    Returns:
+        None.
+    """
+    commands = []
+    pending = 0
+    for local_path, name in files:
+        with open(local_path, 'rb') as local_file:
+            data = local_file.read()
+        commands.append(f'_f = open({name!r}, "wb")')
+        for index in range(0, len(data), chunk_size):
+            chunk = data[index:index + chunk_size]
+            if pending + len(chunk) > chunk_size:
+                repl.exec('\n'.join(commands))
+                commands = []
+                pending = 0
+            commands.append(f'_f.write({chunk!r})')
+            pending += len(chunk)
+        commands.append('_f.close()')
+    if commands:
+        repl.exec('\n'.join(commands))
+
+
+def deploy(port: str, paths: List[str], baudrate: int = 115200, chunk_size: int = 1024,
+           force: bool = False, verify: bool = True) -> List[Dict]:
+    """
+    Upload the files whose content differs from the one on the board.
+
+    Args:
+        port: Serial port the board is connected to.
+        paths: Local files, uploaded to the root of the board with the same name.
+        baudrate: Speed of the serial port.
+        chunk_size: Largest amount of file data sent on a command.
+        force: Upload all the files without comparing them.
+        verify: Compare the hash of the files uploaded afterwards.
+
+    Returns:
+        Report of each file with its name, size and status.
+    """
+    files = [(path, os.path.basename(path)) for path in paths]
+    local = {name: file_hash(path) for path, name in files}
+    opened = SerialPort(port, baudrate) if serial is not None else PosixPort(port, baudrate)
+    repl = RawREPL(opened)
+    started = time.perf_counter()
+
+    try:
+        repl.enter()
+        names = [name for _, name in files]
+        remote = {} if force else remote_hashes(repl, names)
+        changed = [(path, name) for path, name in files if remote.get(name) != local[name]]
+        upload(repl, changed, chunk_size)
+
+        if verify and changed:
+            uploaded = remote_hashes(repl, [name for _, name in changed])
+            wrong = [name for name, digest in uploaded.items() if digest != local[name]]
+            if wrong:
+                raise REPLError(f"hash mismatch after uploading {', '.join(wrong)}")
+        repl.exit()
+    finally:
+        opened.close()
+
+    elapsed = time.perf_counter() - started
+    changed_names = {name for _, name in changed}
+    report = [{'file': name, 'size': os.path.getsize(path),
+               'status': 'uploaded' if name in changed_names else 'unchanged'}
+              for path, name in files]
+
+    for entry in report:
+        print(f"{entry['file']:<32} {entry['status']:<9} {entry['size']:>8}")
+    print(f"{len(changed)} uploaded, {len(files) - len(changed)} unchanged, "
+          f"{repl.bytes_sent} bytes sent, {repl.bytes_received} bytes received "
+          f"in {elapsed:.2f} s")
+    return report
+
+
+def collect_paths(paths: List[str]) -> List[str]:
+    """
+    Expand the folders given into the python files they hold.
+
+    Args:
+        paths: Files and folders.
+
+    Returns:
+        Files.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                         if name.endswith(PY_EXTENSION))
+        else:
+            files.append(path)
+    return files
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Upload the changed files onto the board.')
+
+    parser.add_argument('paths', nargs='+', help='Files or folders with the files to upload.')
+    parser.add_argument('-p', '--port', action='store', required=True, type=str,
+                        help='Port the board is connected to.')
+    parser.add_argument('-b', '--baudrate', action='store', default=115200, type=int,
+                        help='Speed of the serial port.')
+    parser.add_argument('-c', '--chunk-size', action='store', default=1024, type=int,
+                        help='Largest amount of file data sent on each command.')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='Upload all the files without comparing them.')
+    parser.add_argument('--no-verify', action='store_true',
+                        help='Do not check the files once uploaded.')
+
+    args = parser.parse_args()
+    deploy(args.port, collect_paths(args.paths), args.baudrate, args.chunk_size, args.force,
+           not args.no_verify)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Script to report the footprint of the board modules and check it against a budget.
+
+For each module it shows:
+
+- the size of the source, of the minified code and of the bytecode,
+- the time taken to import it,
+- the peak and retained memory allocated while importing it and, for the
+  modules on `BOARD_CLASSES`, while constructing their board.
+
+Modules are imported on a new interpreter each, using the stand-ins of the
+`host` package, and memory is measured with tracemalloc. CPython objects are larger
+than MicroPython ones, so the figures are meant to compare changes rather than to
+predict the free heap on the board.
+
+The code is minified with pyminifier, as `uncomment.py` does, when it is installed and
+otherwise by dropping docstrings and comments with `ast`. Bytecode is compiled with
+`mpy-cross` when it is installed and otherwise with CPython.
+
+The budget is a JSON file with the largest value accepted by module and figure, `*`
+applies to every module and `total` to the sum of the sizes of all of them, e.g.::
+
+    {"*": {"import_retained": 20000}, "status_board": {"minified": 9000},
+     "total": {"bytecode": 120000}, "tools": {"minified": "pyminifier"}}
+
+`tools` gives the minifier and compiler the sizes were measured with. Sizes from other
+tools are not comparable, so they are not checked then. `--record` writes the budget
+from the figures measured, `SIZE_MARGIN` and `MEMORY_MARGIN` above them, keeping the
+limits of `*`.
+
+The script exits with an error when any value is over the budget.
+"""
+
+import argparse
+import ast
+import importlib.util
+import json
+import marshal
+import math
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'footprint_budget.json')
+FIGURES = ['source', 'minified', 'bytecode', 'import_ms', 'import_peak', 'import_retained',
+           'construct_peak', 'construct_retained']
+SIZE_FIGURES = ['minified', 'bytecode']
+MEMORY_FIGURES = ['import_peak', 'import_retained', 'construct_peak', 'construct_retained']
+
+# Share of the measured value added on top of it by `--record`.
+SIZE_MARGIN = 0.05
+MEMORY_MARGIN = 0.10
+
+# Native code architecture of the Wemos D1 mini (ESP8266), for the viper kernels.
+MPY_ARCH = 'xtensa'
+
+# Class constructed to measure the `construct_*` figures of each module.
+BOARD_CLASSES = {'status_board': 'StatusBoard', 'indexed_board': 'IndexedStatusBoard'}
+
+# Modules built into the MicroPython firmware, they are imported before measuring
+# so only the code of the repository is counted.
+BUILTIN_MODULES = ['array', 'binascii', 'dht', 'gc', 'json', 'machine', 'math', 'micropython',
+                   'neopixel', 'os', 'random', 'struct', 'sys', 'time', 'uasyncio', 'urandom']
+
+# Run on a new interpreter for each module so none of the repository modules is
+# imported beforehand.
+MEASURE_SCRIPT = '''
+import json, sys, time, tracemalloc
+sys.path.insert(0, {root!r})
+import host
+host.install()
+for name in {builtins!r}:
+    __import__(name)
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+started = time.perf_counter()
+module = __import__({module!r})
+elapsed = time.perf_counter() - started
+current, peak = tracemalloc.get_traced_memory()
+result = {{"import_ms": elapsed * 1000, "import_peak": peak - before,
+          "import_retained": current - before}}
+if {board_class!r}:
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    board = getattr(module, {board_class!r})(neopixels={neopixels})
+    current, peak = tracemalloc.get_traced_memory()
+    result["construct_peak"] = peak - before
+    result["construct_retained"] = current - before
+print(json.dumps(result))
+'''
+
+
+def tools() -> Dict[str, str]:
+    """
+    Get the tools the sizes are measured with.
+
+    Returns:
+        Name of the tool by figure.
+    """
+    return {
+        'minified': 'pyminifier' if importlib.util.find_spec('pyminifier') else 'ast',
+        'bytecode': 'mpy-cross' if shutil.which('mpy-cross') else 'marshal',
+    }
+
+
+def minify(source: str) -> str:
+    """
+    Minify a source as it is done for the release.
+
+    Args:
+        source: Python code.
+
+    Returns:
+        Minified code.
+    """
+    if importlib.util.find_spec('pyminifier') is not None:
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import uncomment
+
+        return uncomment.minify_source(source, 'module', uncomment.build_options())
+
+    tree = ast.parse(source)
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+    return ast.unparse(tree) + '\n'
+
+
+def bytecode_size(path: str, source: str) -> int:
+    """
+    Get the size of the compiled module.
+
+    Args:
+        path: Path of the module.
+        source: Code to be compiled.
+
+    Returns:
+        Size in bytes of the `.mpy` file, or of the CPython code object without `mpy-cross`.
+    """
+    mpy_cross = shutil.which('mpy-cross')
+    if mpy_cross is None:
+        return len(marshal.dumps(compile(source, path, 'exec')))
+
+    with tempfile.TemporaryDirectory() as folder:
+        source_path = os.path.join(folder, os.path.basename(path))
+        with open(source_path, 'w') as source_file:
+            source_file.write(source)
+        subprocess.run([mpy_cross, '-march=' + MPY_ARCH, source_path], check=True)
+        return os.path.getsize(source_path[:-3] + '.mpy')
+
+
+def measure_import(module: str, neopixels: int) -> Dict[str, float]:
+    """
+    Import a module on a new interpreter and measure it.
+
+    Args:
+        module: Name of the module.
+        neopixels: Count of pixels of the `StatusBoard` constructed.
+
+    Returns:
+        Import time and allocations, with an `error` if the import failed.
+    """
+    script = MEASURE_SCRIPT.format(root=ROOT_DIR, module=module, neopixels=neopixels,
+                                   builtins=BUILTIN_MODULES,
+                                   board_class=BOARD_CLASSES.get(module))
+    process = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                             cwd=tempfile.gettempdir())
+    if process.returncode:
+        return {'error': process.stderr.strip().splitlines()[-1]}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def measure(paths: List[str], neopixels: int) -> Dict[str, Dict[str, float]]:
+    """
+    Measure every module.
+
+    Args:
+        paths: Modules on the root of the repository.
+        neopixels: Count of pixels of the `StatusBoard` constructed.
+
+    Returns:
+        Figures by module name.
+    """
+    report = {}
+    for path in paths:
+        module = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as source_file:
+            source = source_file.read()
+        minified = minify(source)
+
+        figures = {
+            'source': len(source.encode()),
+            'minified': len(minified.encode()),
+            'bytecode': bytecode_size(path, minified),
+        }
+        figures.update(measure_import(module, neopixels))
+        report[module] = figures
+    return report
+
+
+def check_budget(report: Dict[str, Dict[str, float]], budget: Dict[str, Dict[str, float]],
+                 skipped: List[str] = ()) -> List[str]:
+    """
+    Compare the figures with the budget.
+
+    Args:
+        report: Figures by module name.
+        budget: Largest values by module name, `*` for all the modules.
+        skipped: Figures not to be checked.
+
+    Returns:
+        Description of every value over the budget.
+    """
+    errors = []
+    totals = {figure: sum(figures.get(figure, 0) for figures in report.values())
+              for figure in ('source', 'minified', 'bytecode')}
+
+    for module, figures in dict(report, total=totals).items():
+        limits = budget.get(module, {})
+        if module != 'total':
+            limits = dict(budget.get('*', {}), **limits)
+        if 'error' in figures:
+            errors.append(f"{module}: import failed, {figures['error']}")
+        for figure, limit in limits.items():
+            if figure not in FIGURES:
+                errors.append(f"{module}: unknown figure '{figure}' on the budget")
+                continue
+            if figure in skipped:
+                continue
+            value = figures.get(figure)
+            if value is not None and value > limit:
+                errors.append(f'{module}: {figure} is {value:.0f}, over the budget of {limit}')
+    return errors
+
+
+def record_budget(report: Dict[str, Dict[str, float]], budget: Dict[str, Dict[str, float]]) -> Dict:
+    """
+    Build a budget with limits a margin above the figures measured.
+
+    Args:
+        report: Figures by module name.
+        budget: Current budget, its `*` limits are kept.
+
+    Returns:
+        New budget.
+    """
+    def limit(value: float, margin: float) -> int:
+        return int(math.ceil(value * (1 + margin) / 100) * 100)
+
+    recorded = {'*': budget.get('*', {})}
+    for module, figures in report.items():
+        recorded[module] = {figure: limit(figures[figure], SIZE_MARGIN)
+                            for figure in SIZE_FIGURES}
+        recorded[module].update((figure, limit(figures[figure], MEMORY_MARGIN))
+                                for figure in MEMORY_FIGURES if figure in figures)
+    recorded['total'] = {figure: limit(sum(figures[figure] for figures in report.values()),
+                                       SIZE_MARGIN)
+                         for figure in SIZE_FIGURES}
+    recorded['tools'] = tools()
+    return recorded
+
+
+def print_report(report: Dict[str, Dict[str, float]]):
+    """
+    Print the figures as a table.
+
+    Args:
+        report: Figures by module name.
+
+    Returns:
+        None.
+    """
+    print(f"{'module':<16} {'source':>8} {'minified':>9} {'bytecode':>9} {'import ms':>10} "
+          f"{'peak B':>8} {'kept B':>8} {'board peak':>11} {'board kept':>11}")
+
+    def cell(value: Optional[float], width: int) -> str:
+        return f'{value:>{width}.0f}' if value is not None else f"{'-':>{width}}"
+
+    for module, figures in report.items():
+        print(f"{module:<16} {cell(figures['source'], 8)} {cell(figures['minified'], 9)} "
+              f"{cell(figures['bytecode'], 9)} {figures.get('import_ms', 0):>10.2f} "
+              f"{cell(figures.get('import_peak'), 8)} {cell(figures.get('import_retained'), 8)} "
+              f"{cell(figures.get('construct_peak'), 11)} "
+              f"{cell(figures.get('construct_retained'), 11)}")
+
+    totals = {figure: sum(figures.get(figure, 0) for figures in report.values())
+              for figure in ('source', 'minified', 'bytecode')}
+    print(f"{'total':<16} {totals['source']:>8} {totals['minified']:>9} {totals['bytecode']:>9}")
+
+
+def main(options):
+    """
+    Measure the modules, print the report and check the budget.
+
+    Args:
+        options: `parser.parse_args()` arguments.
+
+    Returns:
+        None.
+    """
+    if options.modules:
+        paths = [os.path.join(ROOT_DIR, module if module.endswith('.py') else f'{module}.py')
+                 for module in options.modules]
+    else:
+        paths = sorted(os.path.join(ROOT_DIR, name) for name in os.listdir(ROOT_DIR)
+                       if name.endswith('.py'))
+
+    report = measure(paths, options.neopixels)
+
+    if options.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    budget = {}
+    if options.budget and os.path.exists(options.budget):
+        with open(options.budget) as budget_file:
+            budget = json.load(budget_file)
+
+    if options.record:
+        with open(options.budget, 'w') as budget_file:
+            json.dump(record_budget(report, budget), budget_file, indent=2)
+            budget_file.write('\n')
+        return
+
+    skipped = []
+    for figure, tool in budget.get('tools', {}).items():
+        if tools()[figure] != tool:
+            print(f'{figure} measured with {tools()[figure]}, not checked against a budget '
+                  f'recorded with {tool}', file=sys.stderr)
+            skipped.append(figure)
+
+    errors = check_budget(report, budget, skipped)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        exit(1)
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Report the footprint of the board modules.')
+
+    parser.add_argument('modules', nargs='*',
+                        help='Modules on the root of the repository, all of them by default.')
+    parser.add_argument('-b', '--budget', action='store', default=DEFAULT_BUDGET, type=str,
+                        help='JSON file with the largest values accepted.')
+    parser.add_argument('-n', '--neopixels', action='store', default=4, type=int,
+                        help='Pixels of the StatusBoard constructed.')
+    parser.add_argument('--json', action='store_true', help='Print the figures as JSON.')
+    parser.add_argument('--record', action='store_true',
+                        help='Write the budget from the figures measured, instead of checking it.')
+
+    main(parser.parse_args())
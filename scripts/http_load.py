@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Script to load-test the uStatusBoard HTTP server from a Linux host.
+
+It opens many connections at the same time against the server, sends a
+request on each one and reports how many succeeded and their latency.
+Some clients can be left idle to check they do not stall the others.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import Counter
+from typing import List, Tuple
+
+
+async def fetch(host: str, port: int, path: str, idle: float) -> Tuple[str, float]:
+    """Send a GET request and wait for the whole response.
+
+    Args:
+        host: Address of the server.
+        port: Port of the server.
+        path: Path to request.
+        idle: Seconds to keep the connection open before sending the request.
+
+    Returns:
+        Status code (or the error) and seconds taken once the request was sent.
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        if idle:
+            await asyncio.sleep(idle)
+        started = time.perf_counter()
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}\r\n\r\n".encode())
+        await writer.drain()
+        status = await reader.readline()
+        await reader.read()
+        writer.close()
+        await writer.wait_closed()
+    except OSError as error:
+        return type(error).__name__, 0.0
+
+    return status.decode().split(" ")[1] if status else "closed", time.perf_counter() - started
+
+
+async def run(options) -> List[Tuple[str, float]]:
+    """Launch all the clients at once.
+
+    Args:
+        options: `parser.parse_args()` arguments.
+
+    Returns:
+        Status and latency of each client.
+    """
+    clients = [
+        fetch(options.host, options.port, options.path, options.idle if index < options.idle_clients else 0)
+        for index in range(options.clients)
+    ]
+    return await asyncio.gather(*clients)
+
+
+def main(options):
+    """Run the load test and print a report.
+
+    Args:
+        options: `parser.parse_args()` arguments.
+
+    Returns:
+        None.
+    """
+    started = time.perf_counter()
+    results = asyncio.run(run(options))
+    elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency for status, latency in results if status == "200")
+    print(f"Clients: {len(results)}  " + "  ".join(f"{key}: {value}" for key, value in sorted(statuses.items())))
+    print(f"Total time: {elapsed * 1000:.1f} ms")
+
+    if latencies:
+        print(f"Latency min: {latencies[0] * 1000:.1f} ms  "
+              f"median: {latencies[len(latencies) // 2] * 1000:.1f} ms  "
+              f"max: {latencies[-1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='Load-test the uStatusBoard HTTP server.')
+
+    parser.add_argument('--host', action='store', default='127.0.0.1', type=str, help='Server address.')
+    parser.add_argument('--port', action='store', default=80, type=int, help='Server port.')
+    parser.add_argument('--path', action='store', default='/', type=str, help='Path to request.')
+    parser.add_argument('-c', '--clients', action='store', default=50, type=int,
+                        help='Simultaneous clients.')
+    parser.add_argument('--idle-clients', action='store', default=0, type=int,
+                        help='Clients that stay idle before sending their request.')
+    parser.add_argument('--idle', action='store', default=1.0, type=float,
+                        help='Seconds the idle clients wait.')
+
+    main(parser.parse_args())
@@ -3,16 +3,25 @@
 Script to automate the process of cleaning micropython files and uploading them
 onto the board.
 
+Files are only built again when their content or the cleaning options change,
+the hash of each source and of its output is kept on a cache file on the output
+directory, so an output changed or removed since it was built is built again.
+Files to build are minified in parallel on a process pool.
+
 It uses:
 pyminifier==2.1
 """
 
 import os
+import json
+import time
+import hashlib
 import argparse
-import platform
-import subprocess
 import importlib.util
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import deploy
 
 module_name = 'pyminifier'
 module_spec = importlib.util.find_spec(module_name)
@@ -24,8 +33,10 @@ else:
     token_utils = importlib.import_module(f'{module_name}.token_utils', module_name)
     minification = importlib.import_module(f'{module_name}.minification', module_name)
     obfuscate = importlib.import_module(f'{module_name}.obfuscate', module_name)
+    module_version = getattr(importlib.import_module(module_name), '__version__', '')
 
 PY_EXTENSION = '.py'
+CACHE_FILE = '.uncomment_cache.json'
 
 
 class CleanOptions:
@@ -61,28 +72,110 @@ class CleanOptions:
         self.use_nonlatin = False
 
 
-def clean_file(source_file_name: str, destination_file_name: str = "", bln_print: bool = 0):
+def build_options() -> CleanOptions:
     """
-    Perform a cleaning action by removing all types of DocStrings on the code.
+    Options used to clean every file.
+
+    Returns:
+        Options for the pyminifier module.
+    """
+    # Change option below `bln_obfuscate` to True if you want to make the code even smaller.
+    return CleanOptions(bln_obfuscate=False)
+
+
+def build_key(options: CleanOptions) -> str:
+    """
+    Describe the options and the pyminifier version, a change on any of them
+    invalidates the cache.
 
     Args:
-        source_file_name: name of the file_name to be parsed.
-        destination_file_name: name of the destination file_name.
-        bln_print: Print lines of file_name.
+        options: Options used to clean the files.
+
+    Returns:
+        Text with all the options.
+    """
+    return json.dumps({'options': vars(options), 'pyminifier': module_version}, sort_keys=True)
+
+
+def source_hash(file_path: str, key: str) -> str:
+    """
+    Hash the content of a file together with the build options.
+
+    Args:
+        file_path: File to be hashed.
+        key: Build options returned by `build_key`.
+
+    Returns:
+        Hexadecimal digest.
+    """
+    digest = hashlib.sha256(key.encode())
+    with open(file_path, 'rb') as source_file:
+        digest.update(source_file.read())
+    return digest.hexdigest()
+
+
+def output_hash(file_path: str) -> Optional[str]:
+    """
+    Hash the content of a built file.
+
+    Args:
+        file_path: File to be hashed.
+
+    Returns:
+        Hexadecimal digest, None if the file does not exist.
+    """
+    try:
+        with open(file_path, 'rb') as output_file:
+            return hashlib.sha256(output_file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def load_cache(cache_path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Read the hashes of the files built on previous runs.
+
+    Args:
+        cache_path: Path of the cache file.
+
+    Returns:
+        Hashes of the source and of the output by file name, empty if there is no cache.
+    """
+    try:
+        with open(cache_path) as cache_file:
+            return json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_path: str, cache: Dict[str, Dict[str, str]]):
+    """
+    Write the hashes of the files built.
+
+    Args:
+        cache_path: Path of the cache file.
+        cache: Hashes of the source and of the output by file name.
 
     Returns:
         None
     """
-    _file = source_file_name
+    with open(cache_path, 'w') as cache_file:
+        json.dump(cache, cache_file, indent=2, sort_keys=True)
 
-    module = os.path.split(_file)[1]
-    module = ".".join(module.split('.')[:-1])
 
-    source = open(_file).read()
-    tokens = token_utils.listified_tokenizer(source)
+def minify_source(source: str, module: str, options: CleanOptions) -> str:
+    """
+    Remove all types of DocStrings and comments from a source.
 
-    # Change option below `bln_obfuscate` to True if you want to make the code even smaller.
-    options = CleanOptions(bln_obfuscate=False)
+    Args:
+        source: Python code to be cleaned.
+        module: Name of the module of the code.
+        options: Options for the pyminifier module.
+
+    Returns:
+        Cleaned code.
+    """
+    tokens = token_utils.listified_tokenizer(source)
 
     if not options.nominify:  # Perform minification
         source = minification.minify(tokens, options)
@@ -97,7 +190,28 @@ def clean_file(source_file_name: str, destination_file_name: str = "", bln_print
         )
         obfuscate.obfuscate(module, tokens, options)
 
-    result = token_utils.untokenize(tokens)
+    return token_utils.untokenize(tokens)
+
+
+def clean_file(source_file_name: str, destination_file_name: str = "", bln_print: bool = 0) -> str:
+    """
+    Perform a cleaning action by removing all types of DocStrings on the code.
+
+    Args:
+        source_file_name: name of the file_name to be parsed.
+        destination_file_name: name of the destination file_name.
+        bln_print: Print lines of file_name.
+
+    Returns:
+        Cleaned code.
+    """
+    _file = source_file_name
+
+    module = os.path.split(_file)[1]
+    module = ".".join(module.split('.')[:-1])
+
+    source = open(_file).read()
+    result = minify_source(source, module, build_options())
 
     if bln_print:
         print(result)
@@ -108,68 +222,153 @@ def clean_file(source_file_name: str, destination_file_name: str = "", bln_print
 
         destination_file.close()
 
+    return result
 
-def push_file(file_path: str, serial_port: str):
+
+def build_file(task: Tuple[str, str, bool]) -> Dict:
     """
-    Execute the commands on the terminal to load the script on the board.
+    Clean a file and measure it, run on the process pool.
 
     Args:
-        file_path: String with the file_name path to be flash on the board.
-        serial_port: String with the serial port to which the board is connected to.
+        task: Input path, output path (empty to not write it) and whether to
+            keep the cleaned code on the result.
 
+    Returns:
+        Sizes in bytes, time taken and the cleaned code if requested.
     """
+    input_path, output_path, keep_result = task
+    started = time.perf_counter()
+    result = clean_file(input_path, output_path)
 
-    if serial_port != '':
+    return {
+        'input_size': os.path.getsize(input_path),
+        'output_size': len(result.encode()),
+        'seconds': time.perf_counter() - started,
+        'result': result if keep_result else None,
+    }
 
-        print('Flashing \'{}\'.\n'.format(file_path))
 
-        command_arguments = ['sudo', 'ampy', '--port', serial_port, 'put', file_path]
+def push_files(file_paths: List[str], serial_port: str):
+    """
+    Upload the files onto the board over a single REPL session, files already on the
+    board with the same content are skipped.
 
-        if os.name == "posix" and platform.system() == "Linux":
-            subprocess.call(command_arguments)
+    Args:
+        file_paths: Files to be flashed on the board.
+        serial_port: String with the serial port to which the board is connected to.
 
-        elif os.name == "nt" and platform.system() == "Windows":
-            subprocess.call(command_arguments[1:])
+    """
 
-        else:
-            print("Hhmm, seems like you have MacOs and we haven't implement the code for this yet.")
+    if serial_port != '' and file_paths:
+        deploy.deploy(serial_port, file_paths)
+
+
+def push_file(file_path: str, serial_port: str):
+    """
+    Upload a single file onto the board.
+
+    Args:
+        file_path: String with the file_name path to be flash on the board.
+        serial_port: String with the serial port to which the board is connected to.
+
+    """
+    push_files([file_path], serial_port)
 
 
 def process_files(python_files: list, projects_input: str, projects_output: str,
-                  print_output: bool, port: str, upload: bool):
+                  print_output: bool, port: str, upload: bool, jobs: int = 0,
+                  use_cache: bool = True) -> List[Dict]:
     """
     Given a list files minify and/or obfuscate them, create new files if required and flash
     them to the board.
 
+    Files whose content and options did not change since the last run, and whose output is
+    still the one built then, are skipped when writing to an output folder, the rest are
+    cleaned in parallel.
+
     Args:
         python_files: Files to be processed.
         projects_input: Folder where files are taken from.
         projects_output: Folder where files are written on.
-        print_output:
+        print_output: Print the cleaned code of each file built.
         port: Port to be used by `ampy` tool.
-        upload: condition to upload file onto the board.
+        upload: condition to upload the files onto the board, only the ones whose content
+            differs from the one on the board are sent.
+        jobs: Processes used to clean the files, one per CPU if 0.
+        use_cache: Skip the files already built with the same content and options.
 
     Returns:
-        None
+        Report of each file with its name, status, sizes and time taken.
     """
+    key = build_key(build_options())
+    cache_path = os.path.join(projects_output, CACHE_FILE) if projects_output != '' else ''
+    cache = load_cache(cache_path) if use_cache and cache_path else {}
+    report = []
+    tasks = []
+
     for file_name in python_files:
         current_input = os.path.join(projects_input, file_name)
-        msg = "Result:\n\n"
+        current_output = os.path.join(projects_output, file_name) if projects_output != '' else ''
+        digest = source_hash(current_input, key)
+        hashes = {'source': digest, 'output': output_hash(current_output)}
+
+        if current_output and cache.get(file_name) == hashes:
+            report.append({'file': file_name, 'status': 'cached', 'hash': digest,
+                           'input_size': os.path.getsize(current_input),
+                           'output_size': os.path.getsize(current_output), 'seconds': 0.0})
+        else:
+            tasks.append((file_name, digest, (current_input, current_output, print_output)))
 
-        if projects_output != '':
-            current_output = os.path.join(projects_output, file_name)
+    if len(tasks) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+            results = list(pool.map(build_file, [task for _, _, task in tasks]))
+    else:
+        results = [build_file(task) for _, _, task in tasks]
 
+    for (file_name, digest, (_, current_output, _)), result in zip(tasks, results):
+        if print_output:
             if current_output.endswith(PY_EXTENSION):
-                msg = f"The file {current_output} will be written with the following:\n\n"
-        else:
-            current_output = projects_output
+                print(f"The file {current_output} will be written with the following:\n\n")
+            else:
+                print("Result:\n\n")
+            print(result.pop('result'))
+            print("\n\n")
+
+        report.append(dict(result, file=file_name, status='built', hash=digest))
+        cache[file_name] = {'source': digest, 'output': output_hash(current_output)}
+
+    if cache_path:
+        save_cache(cache_path, cache)
+
+    if upload and projects_output != '':
+        push_files([os.path.join(projects_output, file_name) for file_name in python_files], port)
+
+    report.sort(key=lambda entry: entry['file'])
+    return report
+
+
+def print_report(report: List[Dict], elapsed: float):
+    """
+    Print the size and time taken for each file.
+
+    Args:
+        report: Entries returned by `process_files`.
+        elapsed: Seconds taken by the whole build.
+
+    Returns:
+        None
+    """
+    print(f"{'file':<32} {'status':<7} {'source':>8} {'output':>8} {'saved':>6} {'ms':>8}")
 
-        print(msg)
-        clean_file(current_input, current_output, bln_print=print_output)
-        print("\n\n")
+    for entry in report:
+        saved = 1 - entry['output_size'] / entry['input_size'] if entry['input_size'] else 0
+        print(f"{entry['file']:<32} {entry['status']:<7} {entry['input_size']:>8} "
+              f"{entry['output_size']:>8} {saved:>6.0%} {entry['seconds'] * 1000:>8.1f}")
 
-        if upload:
-            push_file(current_output, port)
+    built = [entry for entry in report if entry['status'] == 'built']
+    print(f"{len(built)} built, {len(report) - len(built)} cached, "
+          f"{sum(entry['seconds'] for entry in built) * 1000:.1f} ms cleaning, "
+          f"{elapsed * 1000:.1f} ms in total")
 
 
 def build_path_args(path: str) -> Tuple[str, str]:
@@ -222,7 +421,10 @@ def main(options):
         projects_output = options.output
 
     input_dir, input_files = build_path_args(projects_input)
-    process_files(input_files, input_dir, projects_output, print_output, options.port, options.upload)
+    started = time.perf_counter()
+    report = process_files(input_files, input_dir, projects_output, print_output, options.port,
+                           options.upload, jobs=options.jobs, use_cache=not options.force)
+    print_report(report, time.perf_counter() - started)
 
 
 if __name__ == '__main__':
@@ -241,6 +443,10 @@ if __name__ == '__main__':
                         default=False, type=bool, help='Upload file(s) to board.')
     parser.add_argument('--print', action='store', nargs='?',
                         default=True, type=bool, help='Print result.')
+    parser.add_argument('-j', '--jobs', action='store', default=0, type=int,
+                        help='Processes used to clean the files, one per CPU by default.')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='Build all the files, ignoring the cache.')
 
     args = parser.parse_args()
 
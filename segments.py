@@ -0,0 +1,392 @@
+"""
+Named segments of a long strip or of a chain of boards.
+
+A segment is a range of pixels, contiguous or taking every `step` pixel,
+and its operations work on whole slices of the board buffer, so their cost
+in Python code does not grow with the count of pixels. Changes go through
+the board, so they are batched and written as any other change.
+
+    >>> zones = Segments(board)
+    >>> builds = zones.add("builds", 0, 60)
+    >>> evens = zones.add("evens", 0, 30, step=2)
+    >>> builds.fill("green")
+    >>> builds.rotate(1)
+    >>> zones.tile("board", 8)
+"""
+
+
+def _fill(view, pixel):
+    """
+    Repeat a pixel over a buffer, copying the filled part over itself.
+
+    Args:
+        view (memoryview): Buffer to be filled.
+        pixel (bytes): Pixel in the channel order of the strip.
+
+    Returns:
+        None.
+    """
+    size = len(view)
+    if not size:
+        return
+    view[0:3] = pixel
+    filled = 3
+    while filled < size:
+        chunk = min(filled, size - filled)
+        view[filled : filled + chunk] = view[:chunk]
+        filled += chunk
+
+
+def _reverse(view, source, target, count):
+    """
+    Copy pixels in reverse order within a buffer.
+
+    Args:
+        view (memoryview): Buffer with the pixels.
+        source (int): First pixel copied.
+        target (int): First pixel written.
+        count (int): Count of pixels copied.
+
+    Returns:
+        None.
+    """
+    try:
+        for channel in range(3):
+            data = bytes(view[source * 3 + channel : (source + count) * 3 : 3])
+            view[target * 3 + channel : (target + count) * 3 : 3] = data[::-1]
+    except NotImplementedError:
+        # MicroPython does not support slices with a step.
+        data = bytes(view[source * 3 : (source + count) * 3])
+        for index in range(count):
+            offset = (target + count - 1 - index) * 3
+            view[offset : offset + 3] = data[index * 3 : index * 3 + 3]
+
+
+class Segment:
+    """
+    Range of pixels of a board handled as a strip on its own.
+
+    Pixels of a strided segment are gathered into a buffer of its own,
+    changed there and copied back, all of them with sliced copies.
+
+    Attributes:
+        board (StatusBoard): Board holding the pixels.
+        start (int): First pixel on the board.
+        count (int): Count of pixels.
+        step (int): Distance between two pixels of the segment.
+        name (str): Name of the segment.
+    """
+
+    def __init__(self, board, start, count, step=1, name=None):
+        if start < 0 or step < 1 or start + (count - 1) * step >= board.neopixels:
+            raise IndexError("segment out of the board")
+        self.board = board
+        self.start = start
+        self.count = count
+        self.step = step
+        self.name = name
+        self._scratch = bytearray(count * 3) if step > 1 else None
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.pixels)
+
+    @property
+    def pixels(self):
+        """Pixel numbers on the board, as a `range`."""
+        return range(self.start, self.start + self.count * self.step, self.step)
+
+    def _pixel(self, color):
+        """
+        Pack a color in the channel order of the strip.
+
+        Args:
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            bytearray: Pixel with the color.
+        """
+        if isinstance(color, str):
+            color = self.board.get_color(color)
+        order = self.board._order
+        pixel = bytearray(3)
+        pixel[order[0]] = color[0]
+        pixel[order[1]] = color[1]
+        pixel[order[2]] = color[2]
+        return pixel
+
+    def _view(self, gather=True):
+        """
+        Get the pixels of the segment as a contiguous buffer.
+
+        Args:
+            gather (bool): Copy the current pixels of a strided segment,
+            not needed when all of them are overwritten.
+
+        Returns:
+            memoryview: The board buffer itself for contiguous segments,
+            otherwise the buffer of the segment.
+        """
+        if self._scratch is None:
+            first = self.start * 3
+            return self.board._frame[first : first + self.count * 3]
+
+        view = memoryview(self._scratch)
+        if gather:
+            buf = self.board.buf
+            first = self.start * 3
+            stride = self.step * 3
+            end = first + (self.count - 1) * stride + 3
+            try:
+                for channel in range(3):
+                    view[channel::3] = buf[first + channel : end : stride]
+            except NotImplementedError:
+                # MicroPython does not support slices with a step.
+                for index in range(self.count):
+                    offset = first + index * stride
+                    view[index * 3 : index * 3 + 3] = buf[offset : offset + 3]
+        return view
+
+    def _commit(self):
+        """
+        Copy back the pixels of a strided segment and write the board.
+
+        Returns:
+            None.
+        """
+        scratch = self._scratch
+        if scratch is not None:
+            buf = self.board.buf
+            first = self.start * 3
+            stride = self.step * 3
+            end = first + (self.count - 1) * stride + 3
+            try:
+                for channel in range(3):
+                    buf[first + channel : end : stride] = scratch[channel::3]
+            except NotImplementedError:
+                # MicroPython does not support slices with a step.
+                for index in range(self.count):
+                    offset = first + index * stride
+                    buf[offset : offset + 3] = scratch[index * 3 : index * 3 + 3]
+        self.board._write(self.start, self.start + (self.count - 1) * self.step + 1)
+
+    def fill(self, color):
+        """
+        Set a color on all the pixels of the segment.
+
+        Args:
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            _fill(self._view(gather=False), self._pixel(color))
+            self._commit()
+
+    def clear(self):
+        """
+        Turn off all the pixels of the segment.
+
+        Returns:
+            None.
+        """
+        self.fill((0, 0, 0))
+
+    def set_pixel(self, index, color):
+        """
+        Set a color on a pixel of the segment.
+
+        Args:
+            index (int): Pixel number within the segment.
+            color: Name of the color or color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("pixel out of the segment")
+        pixel = self.start + index * self.step
+        with self.board._change:
+            self.board.buf[pixel * 3 : pixel * 3 + 3] = self._pixel(color)
+            self.board._write(pixel, pixel + 1)
+
+    def copy(self, other):
+        """
+        Copy the pixels of another segment, as many as fit on this one.
+
+        Args:
+            other (Segment): Segment the pixels are copied from, it can be
+            on the same board and even overlap this one.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            size = min(self.count, other.count) * 3
+            data = other._view()
+            view = self._view(gather=size < self.count * 3)
+            view[:size] = data[:size]
+            self._commit()
+
+    def shift(self, count, color=(0, 0, 0)):
+        """
+        Move the pixels along the segment, pixels moved out are dropped.
+
+        Args:
+            count (int): Pixels to move, towards the end of the segment if
+            positive and towards its start if negative.
+            color: Color set on the pixels left empty.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            count = max(-self.count, min(self.count, count))
+            view = self._view()
+            size = len(view)
+            moved = abs(count) * 3
+            if count > 0:
+                view[moved:] = view[: size - moved]
+                _fill(view[:moved], self._pixel(color))
+            elif count < 0:
+                view[: size - moved] = view[moved:]
+                _fill(view[size - moved :], self._pixel(color))
+            self._commit()
+
+    def rotate(self, count):
+        """
+        Move the pixels along the segment, pixels moved out come back on the
+        other end.
+
+        Args:
+            count (int): Pixels to move, towards the end of the segment if
+            positive and towards its start if negative.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            view = self._view()
+            size = len(view)
+            moved = count % self.count * 3
+            if moved:
+                tail = bytes(view[size - moved :])
+                view[moved:] = view[: size - moved]
+                view[:moved] = tail
+            self._commit()
+
+    def reverse(self):
+        """
+        Reverse the order of the pixels of the segment.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            _reverse(self._view(), 0, 0, self.count)
+            self._commit()
+
+    def mirror(self):
+        """
+        Copy the first half of the segment onto the second half in reverse
+        order, so the segment is symmetric around its middle.
+
+        Returns:
+            None.
+        """
+        with self.board._change:
+            half = self.count // 2
+            _reverse(self._view(), 0, self.count - half, half)
+            self._commit()
+
+    def set_brightness(self, level):
+        """
+        Set the brightness level of the pixels of the segment, applied on
+        top of the brightness of the board.
+
+        Args:
+            level (int): Brightness level (0 - 255).
+
+        Returns:
+            None.
+        """
+        # Imported here so boards which never dim pixels do not load it.
+        from levels import levels_of
+
+        levels_of(self.board).set_zone(level, self.start, self.count, self.step)
+
+
+class Segments:
+    """
+    Segments of a board by name.
+
+    Attributes:
+        board (StatusBoard): Board holding the segments.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self._segments = {}
+
+    def __getitem__(self, name):
+        return self._segments[name]
+
+    def __contains__(self, name):
+        return name in self._segments
+
+    def __iter__(self):
+        return iter(self._segments)
+
+    def add(self, name, start, count, step=1):
+        """
+        Register a segment, replacing any other one with the same name.
+
+        Args:
+            name (str): Name of the segment.
+            start (int): First pixel on the board.
+            count (int): Count of pixels.
+            step (int): Distance between two pixels of the segment.
+
+        Returns:
+            Segment: Segment registered.
+        """
+        segment = Segment(self.board, start, count, step, name)
+        self._segments[name] = segment
+        return segment
+
+    def remove(self, name):
+        """
+        Drop a segment.
+
+        Args:
+            name (str): Name of the segment.
+
+        Returns:
+            None.
+        """
+        del self._segments[name]
+
+    def tile(self, prefix, size):
+        """
+        Split the whole board into consecutive segments of the same size,
+        e.g. one for each board of a chain.
+
+        Args:
+            prefix (str): Start of the names, followed by the number of the
+            segment.
+            size (int): Pixels on each segment, the last one gets what is
+            left.
+
+        Returns:
+            list: Segments registered.
+        """
+        segments = []
+        for start in range(0, self.board.neopixels, size):
+            count = min(size, self.board.neopixels - start)
+            segments.append(self.add("%s%d" % (prefix, len(segments)), start, count))
+        return segments
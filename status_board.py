@@ -15,10 +15,109 @@ by default to pin 15 on the ESP8266
 -------------------------------
 More info: https://github.com/yeyeto2788/uStatusBoard
 """
+
+import sys
+import time
+
 import machine
 import neopixel
 import urandom
 
+if sys.implementation.name == "micropython":
+    import micropython
+
+    @micropython.viper
+    def _apply_lut(out, frame, lut, start: int, end: int):
+        """
+        Translate `frame` into `out` through the `lut` table.
+
+        Arguments as on the CPython version below.
+        """
+        dst = ptr8(out)  # noqa: F821
+        src = ptr8(frame)  # noqa: F821
+        table = ptr8(lut)  # noqa: F821
+        index = start
+        while index < end:
+            dst[index] = table[src[index]]
+            index += 1
+
+    @micropython.viper
+    def _equal(a, b, start: int, end: int) -> bool:
+        """
+        Compare a range of two buffers without copying it.
+
+        Arguments as on the CPython version below.
+        """
+        left = ptr8(a)  # noqa: F821
+        right = ptr8(b)  # noqa: F821
+        index = start
+        while index < end:
+            if left[index] != right[index]:
+                return False
+            index += 1
+        return True
+
+else:
+
+    def _apply_lut(out, frame, lut, start, end):
+        """
+        Translate `frame` into `out` through the `lut` table.
+
+        Args:
+            out (bytearray): Buffer where the result is written.
+            frame (bytearray): Buffer to be translated.
+            lut (bytearray): Table of 256 entries.
+            start (int): First byte to translate.
+            end (int): Byte after the last one to translate.
+
+        Returns:
+            None.
+        """
+        out[start:end] = frame[start:end].translate(lut)
+
+    def _equal(a, b, start, end):
+        """
+        Compare a range of two buffers without copying it.
+
+        Args:
+            a (bytearray): First buffer.
+            b (bytearray): Second buffer, of the same type as `a`.
+            start (int): First byte to compare.
+            end (int): Byte after the last one to compare.
+
+        Returns:
+            bool: True if the bytes in the range are the same.
+        """
+        return memoryview(a)[start:end] == memoryview(b)[start:end]
+
+
+class _Change:
+    """
+    Context manager around a change of the buffers of a board.
+
+    It counts as a batch, so scheduled frames are put off until the change
+    is complete, and it writes the change on exit as `_write` would. One is
+    created with each board, and holds its count of batches in progress, so
+    changing the board allocates nothing.
+
+    Attributes:
+        board (StatusBoard): Board changed.
+        depth (int): Count of batches, and changes, in progress.
+    """
+
+    def __init__(self, board):
+        self.board = board
+        self.depth = 0
+
+    def __enter__(self):
+        self.depth += 1
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.depth -= 1
+        board = self.board
+        if board.auto_write and not self.depth and not board.held:
+            board.show()
+
 
 class StatusBoard:
     """
@@ -30,38 +129,340 @@ class StatusBoard:
         neostrip (neopixel.NeoPixel): Instance of NeoPixel where all
         change are applied to it.
         brightness (int): level applied on each color of the led (0 - 255).
+        levels (levels.Levels): Brightness level of each pixel applied on top
+        of `brightness`, None unless attached with `levels.levels_of`.
+        gamma (float): Gamma correction applied to every color, None to keep
+        colors linear.
         colors (dict): All available colors by combining RGB states.
+        buf (bytearray): Colors set on each pixel in the channel order of the
+        strip, brightness and gamma are applied when writing to `neostrip`.
+        auto_write (bool): Whether each change is sent to the strip right
+        away or kept until `show` is called.
+        held (bool): Whether changes, batches included, are left for a
+        `refresh.Refresher` to write, set while it runs.
+        writes_saved (int): Count of strip writes avoided by batching
+        changes together.
+        writes_sent (int): Count of writes actually sent to the strip.
+        writes_skipped (int): Count of writes skipped because the frame was
+        the same as the last one sent.
+        write_hist (metrics.Histogram): Histogram getting the microseconds
+        spent on each strip write, None to not time them.
     """
 
-    def __init__(self, pin=15, neopixels=4, brightness=255):
+    default_colors = {
+        "nocolor": [0, 0, 0],
+        "blue": [0, 0, 1],
+        "green": [0, 1, 0],
+        "cyan": [0, 1, 1],
+        "red": [1, 0, 0],
+        "magenta": [1, 0, 1],
+        "yellow": [1, 1, 0],
+        "white": [1, 1, 1],
+    }
+
+    def __init__(
+        self, pin=15, neopixels=4, brightness=255, auto_write=True, gamma=None
+    ):
+        """Set up the strip and turn all its LEDs off."""
         self.pin = machine.Pin(pin, machine.Pin.OUT)
         self.neopixels = neopixels
         self.neostrip = neopixel.NeoPixel(self.pin, self.neopixels)
-        self.brightness = brightness
-        self.colors = {
-            "nocolor": [0, 0, 0],
-            "blue": [0, 0, 1],
-            "green": [0, 1, 0],
-            "cyan": [0, 1, 1],
-            "red": [1, 0, 0],
-            "magenta": [1, 0, 1],
-            "yellow": [1, 1, 0],
-            "white": [1, 1, 1],
-        }
+        self.auto_write = auto_write
+        self.held = False
+        self.writes_saved = 0
+        self.writes_sent = 0
+        self.writes_skipped = 0
+        self.write_hist = None
+        self._pending = 0
+        self._change = _Change(self)
+        self._order = getattr(self.neostrip, "ORDER", (1, 0, 2))
+        self._init_buffers()
+        self._synced = False
+        self._dirty_start = 0
+        self._dirty_end = len(self.neostrip.buf)
+        self._palette = {}
+        self._lut = bytearray(256)
+        self._identity = True
+        self._gamma = gamma
+        self._brightness = brightness
+        self.levels = None
+        self._build_lut()
+        self.colors = dict(self.default_colors)
         self.clear_all()
 
-    def _get_color_brightness(self, color):
+    def _init_buffers(self):
+        """
+        Allocate the frame and the copy of the last frame sent.
+
+        Subclasses keeping the pixels in another form override it, it runs
+        before the brightness table and the palette are built.
+
+        Returns:
+            None.
+        """
+        self.buf = bytearray(len(self.neostrip.buf))
+        self._frame = memoryview(self.buf)
+        self._shadow = bytearray(len(self.buf))
+
+    @property
+    def brightness(self):
+        """Level applied on each color of the led (0 - 255)."""
+        return self._brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        with self._change:
+            self._brightness = value
+            self._build_lut()
+            self._write()
+
+    @property
+    def gamma(self):
+        """Gamma correction applied to every color, None for linear colors."""
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, value):
+        with self._change:
+            self._gamma = value
+            self._build_lut()
+            self._write()
+
+    def _build_lut(self):
+        """
+        Build the table translating each color value for the strip.
+
+        Gamma correction is applied first and then the brightness level.
+        The whole strip is translated again on the next write, the colors
+        set on the pixels are kept as they are.
+
+        Returns:
+            None.
+        """
+        brightness = self._brightness
+        gamma = self._gamma
+        lut = self._lut
+        for value in range(256):
+            if gamma is not None:
+                value_out = int(255 * (value / 255) ** gamma + 0.5)
+            else:
+                value_out = value
+            lut[value] = (value_out * brightness + 127) // 255
+        self._identity = gamma is None and brightness == 255
+        self._synced = False
+
+    @property
+    def colors(self):
+        """All available colors by combining RGB states."""
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        self._colors = value
+        self._build_palette()
+
+    def add_color(self, name, color):
+        """
+        Register a new named color or replace an existing one.
+
+        Changes made directly on the `colors` dictionary are not seen by the
+        palette, use this method (or assign a new dictionary) instead.
+
+        Args:
+            name (str): Name of the color.
+            color (list): Color in [R, G, B] format, each value from 0 to 1.
+
+        Returns:
+            None.
+        """
+        self._colors[name] = color
+        self._build_palette()
+
+    def _build_palette(self):
+        """
+        Scale every color on `colors` to full range values.
+
+        The result is kept, so setting a named color does not need to
+        compute it again.
+
+        Returns:
+            None.
+        """
+        palette = {}
+        for name, color in self._colors.items():
+            red, green, blue = color
+            palette[name.lower()] = (int(red * 255), int(green * 255), int(blue * 255))
+        self._palette = palette
+
+    def __enter__(self):
+        """Start a batch, see `batch`."""
+        self._change.depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Finish a batch, the strip is written once the outermost ends."""
+        self._change.depth -= 1
+        if not self._change.depth and not self.held:
+            self.show()
+
+    def batch(self):
+        """
+        Group several changes so they are sent to the strip in one write.
+
+        Batches can be nested, the strip is only written once the outermost
+        one finishes::
+
+            with board.batch():
+                board.set_pixel_color(0, "green")
+                board.set_pixel_color(1, "red")
+
+        Returns:
+            The board itself, to be used as a context manager.
+        """
+        return self
+
+    def show(self, force=False):
+        """
+        Send all pending changes to the strip in a single write.
+
+        A copy of the last frame sent is kept, when the changed part of the
+        frame matches it nothing is sent to the strip. Otherwise, the changed
+        part goes through the brightness and gamma table, and the `levels`
+        of the pixels if any, in a single pass.
+
+        Args:
+            force (bool): Write the whole frame even if it looks unchanged,
+            useful after changing `buf` directly.
+
+        Returns:
+            None.
+        """
+        if force:
+            self._pending += 1
+            self._synced = False
+        if not self._pending:
+            return
+
+        self.writes_saved += self._pending - 1
+        self._pending = 0
+
+        if self._synced:
+            start, end = self._dirty_start, self._dirty_end
+        else:
+            start, end = 0, len(self._shadow)
+        self._dirty_start = len(self._shadow)
+        self._dirty_end = 0
+
+        if self._synced and (
+            start >= end or _equal(self.buf, self._shadow, start, end)
+        ):
+            self.writes_skipped += 1
+            return
+
+        self._shadow[start:end] = self._frame[start:end]
+        self._synced = True
+        if self.levels is not None:
+            self.levels.render(
+                self.neostrip.buf, self.buf, self._lut, start // 3, end // 3
+            )
+        elif self._identity:
+            self.neostrip.buf[start:end] = self._frame[start:end]
+        else:
+            _apply_lut(self.neostrip.buf, self.buf, self._lut, start, end)
+        self._send()
+
+    def _send(self):
+        """
+        Write `neostrip` to the strip, timing it if `write_hist` is set.
+
+        Returns:
+            None.
+        """
+        if self.write_hist is None:
+            self.neostrip.write()
+        else:
+            started = time.ticks_us()
+            self.neostrip.write()
+            self.write_hist.add(time.ticks_diff(time.ticks_us(), started))
+        self.writes_sent += 1
+
+    def stats(self):
+        """
+        Get the counters of writes done on the strip.
+
+        Returns:
+            Dictionary with the `writes_sent`, `writes_skipped` and
+            `writes_saved` counters.
+        """
+        return {
+            "writes_sent": self.writes_sent,
+            "writes_skipped": self.writes_skipped,
+            "writes_saved": self.writes_saved,
+        }
+
+    def _pixel_index(self, pixel):
+        """
+        Check a pixel number, negative ones count from the end of the strip.
+
+        Args:
+            pixel (int): Pixel number.
+
+        Returns:
+            int: Position of the pixel on the strip.
+        """
+        if pixel < 0:
+            pixel += self.neopixels
+        if not 0 <= pixel < self.neopixels:
+            raise IndexError("pixel out of range")
+        return pixel
+
+    def _write(self, start=0, end=None):
+        """
+        Mark pixels as changed and write them if nothing defers it.
+
+        The write is deferred while `auto_write` is off, a batch is in
+        progress or the board is `held`. Methods changing the buffers do it
+        and call this within a batch of their own, so a frame scheduled by a
+        `Refresher` in between is put off instead of showing half a change,
+        see `_Change`.
+
+        Args:
+            start (int): First pixel changed.
+            end (int): Pixel after the last one changed, all the strip
+            from `start` if not given.
+
+        Returns:
+            None.
+        """
+        if end is None:
+            end = self.neopixels
+        start *= 3
+        end *= 3
+        if start < self._dirty_start:
+            self._dirty_start = start
+        if end > self._dirty_end:
+            self._dirty_end = end
+
+        self._pending += 1
+        if self.auto_write and not self._change.depth and not self.held:
+            self.show()
+
+    def get_color(self, color):
         """
-        Cycle through the colors and find the given key color and return the
-        given color matching the brightness level.
+        Get the value of a named color from the palette.
+
+        Brightness is applied when the strip is written.
 
         Args:
-            color (str): Name of the color get the value from.
+            color (str): Name of the color.
 
         Returns:
-            List with color at a brightness level.
+            Tuple with the color in (R, G, B) format.
         """
-        return [(c_value * self.brightness) for c_value in self.colors[color.lower()]]
+        rgb = self._palette.get(color)
+        if rgb is None:
+            rgb = self._palette[color.lower()]
+        return rgb
 
     def set_pixel_color(self, pixel, color):
         """
@@ -74,8 +475,7 @@ class StatusBoard:
         Returns:
             None.
         """
-        self.neostrip[pixel] = self._get_color_brightness(color)
-        self.neostrip.write()
+        self.set_pixel_raw_color(pixel, self.get_color(color))
 
     def clear_all(self):
         """
@@ -84,9 +484,7 @@ class StatusBoard:
         Returns:
             None.
         """
-        for pixel in range(self.neopixels):
-            self.neostrip[pixel] = (0, 0, 0)
-        self.neostrip.write()
+        self.fill((0, 0, 0))
 
     def color_all(self, color):
         """
@@ -98,27 +496,77 @@ class StatusBoard:
         Returns:
             None.
         """
-        for pixel in range(self.neopixels):
-            self.neostrip[pixel] = self._get_color_brightness(color)
-        self.neostrip.write()
+        self.fill(self.get_color(color))
 
-    def _get_random_int(self):
+    def fill(self, color):
         """
-        Generate a seudo random integer from 0 to 255.
+        Set a color in [R, G, B] format on all LEDs on the board.
+
+        Only the first pixel is set by hand, the rest of the strip is filled
+        by copying the already filled part over itself, doubling it each time.
+
+        Args:
+            color (tuple): Color in [R, G, B] format.
 
         Returns:
-            Integer generated.
+            None.
         """
-        int_return = urandom.getrandbits(8)
-        if 0 < int_return < 256:
-            return int_return
-        else:
-            return 0
+        with self._change:
+            frame = self._frame
+            order = self._order
+            frame[order[0]] = color[0]
+            frame[order[1]] = color[1]
+            frame[order[2]] = color[2]
+
+            filled = 3
+            size = len(frame)
+            while filled < size:
+                chunk = min(filled, size - filled)
+                end = filled + chunk
+                frame[filled:end] = frame[:chunk]
+                filled = end
+            self._write()
+
+    def set_frame(self, frame, pixel=0, raw=False):
+        """
+        Copy a whole frame of packed colors onto the strip.
+
+        Args:
+            frame (bytes): Colors packed as R, G, B bytes for each pixel, it
+            can be a `bytes`, `bytearray` or `memoryview`.
+            pixel (int): Pixel where the frame starts.
+            raw (bool): The frame is already in the channel order used by the
+            strip (GRB for WS2812B) so it is copied as it is.
+
+        Returns:
+            None.
+        """
+        with self._change:
+            start = pixel * 3
+            end = start + len(frame)
+            order = self._order
+
+            if raw or order[:3] == (0, 1, 2):
+                self._frame[start:end] = frame
+            else:
+                buf = self.buf
+                try:
+                    for channel in range(3):
+                        first = start + order[channel]
+                        buf[first:end:3] = frame[channel::3]
+                except NotImplementedError:
+                    # MicroPython does not support slices with a step.
+                    for index in range(0, end - start, 3):
+                        buf[start + index + order[0]] = frame[index]
+                        buf[start + index + order[1]] = frame[index + 1]
+                        buf[start + index + order[2]] = frame[index + 2]
+            self._write(pixel, end // 3)
 
     def set_pixel_random_color(self, pixel):
         """
-        Create a random color using the `_get_random_int` method for
-        red, green and blue.
+        Set a random color on a pixel.
+
+        The three channels come from a single 24 bits random number.
 
         Args:
             pixel (int): Led position on the board.
@@ -126,12 +574,8 @@ class StatusBoard:
         Returns:
             None.
         """
-        r_color = self._get_random_int()
-        g_color = self._get_random_int()
-        b_color = self._get_random_int()
-        color = [r_color, g_color, b_color]
-        self.neostrip[pixel] = color
-        self.neostrip.write()
+        value = urandom.getrandbits(24)
+        self.set_pixel_raw_color(pixel, (value >> 16, value >> 8 & 0xFF, value & 0xFF))
 
     def get_pixel_raw_color(self, pixel):
         """
@@ -141,9 +585,16 @@ class StatusBoard:
             pixel (int): Pixel number
 
         Returns:
-            List the real color on the pixel.
+            Tuple with the color set on the pixel.
         """
-        return self.neostrip[pixel]
+        offset = self._pixel_index(pixel) * 3
+        order = self._order
+        buf = self.buf
+        return (
+            buf[offset + order[0]],
+            buf[offset + order[1]],
+            buf[offset + order[2]],
+        )
 
     def set_pixel_raw_color(self, pixel, color):
         """
@@ -156,5 +607,25 @@ class StatusBoard:
         Returns:
             None.
         """
-        self.neostrip[pixel] = color
-        self.neostrip.write()
+        pixel = self._pixel_index(pixel)
+        with self._change:
+            self._set_pixel(pixel, color)
+            self._write(pixel, pixel + 1)
+
+    def _set_pixel(self, pixel, color):
+        """
+        Store a color on `buf` following the channel order of the strip.
+
+        Args:
+            pixel (int): Position of the pixel, already checked.
+            color (list): Color in [R, G, B] format.
+
+        Returns:
+            None.
+        """
+        offset = pixel * 3
+        order = self._order
+        buf = self.buf
+        buf[offset + order[0]] = color[0]
+        buf[offset + order[1]] = color[1]
+        buf[offset + order[2]] = color[2]